@@ -2,6 +2,6 @@
 
 from .jwt_handler import JWTHandler
 from .api_key_auth import APIKeyAuth
-from .rbac import RBACManager
+from .rbac import RBACManager, get_rbac
 
-__all__ = ["JWTHandler", "APIKeyAuth", "RBACManager"]
\ No newline at end of file
+__all__ = ["JWTHandler", "APIKeyAuth", "RBACManager", "get_rbac"]
\ No newline at end of file
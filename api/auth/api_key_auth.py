@@ -60,6 +60,8 @@ class APIKeyAuth:
     def __init__(self):
         self.api_keys: Dict[str, APIKey] = {}
         self.key_to_user: Dict[str, str] = {}  # key_hash -> user_id
+        # user_id -> key ids; a dict rather than a set so listings keep creation order
+        self.user_keys: Dict[str, Dict[str, None]] = defaultdict(dict)
         self.rate_limiter = RateLimiter()
     
     def generate_api_key(self, name: str, user_id: str, permissions: List[str], 
@@ -70,6 +72,7 @@ class APIKeyAuth:
         # Store the API key
         self.api_keys[api_key.id] = api_key
         self.key_to_user[api_key.key_hash] = user_id
+        self.user_keys[user_id][api_key.id] = None
         
         return api_key, raw_key
     
@@ -130,9 +133,14 @@ class APIKeyAuth:
         
         return True
     
+    def user_owns_key(self, user_id: str, key_id: str) -> bool:
+        """Check whether an API key belongs to a user"""
+        key_ids = self.user_keys.get(user_id)
+        return key_ids is not None and key_id in key_ids
+    
     def list_user_keys(self, user_id: str) -> List[APIKey]:
         """List all API keys for a user"""
-        return [key for key in self.api_keys.values() if key.user_id == user_id]
+        return [self.api_keys[key_id] for key_id in self.user_keys.get(user_id, ())]
     
     def get_key_stats(self, key_id: str) -> Optional[Dict[str, any]]:
         """Get API key usage statistics"""
@@ -199,7 +207,7 @@ class APIKeyAuth:
         return {
             "api_key_id": api_key.id,
             "user_id": api_key.user_id,
-            "permissions": api_key.permissions,
+            "permissions": frozenset(api_key.permissions),
             "rate_limit": api_key.rate_limit,
             "authenticated": True
         }
\ No newline at end of file
@@ -12,6 +12,8 @@ import base64
 class JWTHandler:
     """Lightweight JWT token handler without external dependencies"""
     
+    __slots__ = ('secret_key', 'algorithm', 'default_expiry')
+    
     def __init__(self, secret_key: Optional[str] = None, algorithm: str = "HS256"):
         self.secret_key = secret_key or secrets.token_urlsafe(32)
         self.algorithm = algorithm
@@ -154,6 +156,7 @@ class JWTHandler:
             "user_id": payload.get("sub"),
             "username": payload.get("username"),
             "role": payload.get("role"),
-            "permissions": payload.get("permissions", []),
-            "token_type": payload.get("type", "access")
+            "permissions": frozenset(payload.get("permissions", [])),
+            "token_type": payload.get("type", "access"),
+            "exp": payload.get("exp")
         }
\ No newline at end of file
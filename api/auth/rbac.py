@@ -1,234 +1,441 @@
 """Role-Based Access Control (RBAC) Manager"""
 
-from typing import Dict, List, Set, Optional
+from functools import lru_cache
+from types import MappingProxyType
+from typing import (
+    AbstractSet,
+    Dict,
+    Final,
+    FrozenSet,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+    Union,
+)
 from enum import Enum
 
 from ..models.user import User, UserRole
 
 
 class Permission(Enum):
-    """System permissions"""
+    """System permissions
+
+    Each member also carries a distinct ``bit`` so permission sets can be
+    checked as integer masks, and its ``category``/``action`` parts so callers
+    need not parse the value string.
+    """
+
+    def __init__(self, value: str):
+        self.bit = 1 << len(self.__class__._member_map_)
+        self.category, _, self.action = value.partition(":")
+
     # Scan management
     SCAN_CREATE = "scan:create"
     SCAN_READ = "scan:read"
     SCAN_DELETE = "scan:delete"
     SCAN_RUN = "scan:run"
-    
+
     # Report management
     REPORT_CREATE = "report:create"
     REPORT_READ = "report:read"
     REPORT_EXPORT = "report:export"
     REPORT_DELETE = "report:delete"
-    
+
     # Configuration management
     CONFIG_READ = "config:read"
     CONFIG_WRITE = "config:write"
     CONFIG_POLICY_MANAGE = "config:policy:manage"
-    
+
     # User management
     USER_CREATE = "user:create"
     USER_READ = "user:read"
     USER_UPDATE = "user:update"
     USER_DELETE = "user:delete"
-    
+
     # API key management
     APIKEY_CREATE = "apikey:create"
     APIKEY_READ = "apikey:read"
     APIKEY_DELETE = "apikey:delete"
-    
+
     # Webhook management
     WEBHOOK_CREATE = "webhook:create"
     WEBHOOK_READ = "webhook:read"
     WEBHOOK_UPDATE = "webhook:update"
     WEBHOOK_DELETE = "webhook:delete"
-    
+
     # System administration
     SYSTEM_ADMIN = "system:admin"
     SYSTEM_METRICS = "system:metrics"
     SYSTEM_LOGS = "system:logs"
 
 
-class RBACManager:
-    """Role-Based Access Control Manager"""
-    
-    def __init__(self):
-        self.role_permissions = self._initialize_role_permissions()
-        self.resource_permissions = self._initialize_resource_permissions()
-    
-    def _initialize_role_permissions(self) -> Dict[UserRole, Set[Permission]]:
-        """Initialize default role permissions"""
-        return {
-            UserRole.ADMIN: {
+# Default permission tables; each RBACManager starts from a copy
+_ROLE_PERMISSIONS: Final[Mapping[UserRole, FrozenSet[Permission]]] = MappingProxyType(
+    {
+        UserRole.ADMIN: frozenset(
+            {
                 # Full system access
-                Permission.SCAN_CREATE, Permission.SCAN_READ, Permission.SCAN_DELETE, Permission.SCAN_RUN,
-                Permission.REPORT_CREATE, Permission.REPORT_READ, Permission.REPORT_EXPORT, Permission.REPORT_DELETE,
-                Permission.CONFIG_READ, Permission.CONFIG_WRITE, Permission.CONFIG_POLICY_MANAGE,
-                Permission.USER_CREATE, Permission.USER_READ, Permission.USER_UPDATE, Permission.USER_DELETE,
-                Permission.APIKEY_CREATE, Permission.APIKEY_READ, Permission.APIKEY_DELETE,
-                Permission.WEBHOOK_CREATE, Permission.WEBHOOK_READ, Permission.WEBHOOK_UPDATE, Permission.WEBHOOK_DELETE,
-                Permission.SYSTEM_ADMIN, Permission.SYSTEM_METRICS, Permission.SYSTEM_LOGS
-            },
-            
-            UserRole.DEVELOPER: {
+                Permission.SCAN_CREATE,
+                Permission.SCAN_READ,
+                Permission.SCAN_DELETE,
+                Permission.SCAN_RUN,
+                Permission.REPORT_CREATE,
+                Permission.REPORT_READ,
+                Permission.REPORT_EXPORT,
+                Permission.REPORT_DELETE,
+                Permission.CONFIG_READ,
+                Permission.CONFIG_WRITE,
+                Permission.CONFIG_POLICY_MANAGE,
+                Permission.USER_CREATE,
+                Permission.USER_READ,
+                Permission.USER_UPDATE,
+                Permission.USER_DELETE,
+                Permission.APIKEY_CREATE,
+                Permission.APIKEY_READ,
+                Permission.APIKEY_DELETE,
+                Permission.WEBHOOK_CREATE,
+                Permission.WEBHOOK_READ,
+                Permission.WEBHOOK_UPDATE,
+                Permission.WEBHOOK_DELETE,
+                Permission.SYSTEM_ADMIN,
+                Permission.SYSTEM_METRICS,
+                Permission.SYSTEM_LOGS,
+            }
+        ),
+        UserRole.DEVELOPER: frozenset(
+            {
                 # Developer workflow access
-                Permission.SCAN_CREATE, Permission.SCAN_READ, Permission.SCAN_RUN,
-                Permission.REPORT_CREATE, Permission.REPORT_READ, Permission.REPORT_EXPORT,
+                Permission.SCAN_CREATE,
+                Permission.SCAN_READ,
+                Permission.SCAN_RUN,
+                Permission.REPORT_CREATE,
+                Permission.REPORT_READ,
+                Permission.REPORT_EXPORT,
                 Permission.CONFIG_READ,
-                Permission.APIKEY_CREATE, Permission.APIKEY_READ,
-                Permission.WEBHOOK_CREATE, Permission.WEBHOOK_READ, Permission.WEBHOOK_UPDATE,
-                Permission.SYSTEM_METRICS
-            },
-            
-            UserRole.VIEWER: {
+                Permission.APIKEY_CREATE,
+                Permission.APIKEY_READ,
+                Permission.WEBHOOK_CREATE,
+                Permission.WEBHOOK_READ,
+                Permission.WEBHOOK_UPDATE,
+                Permission.SYSTEM_METRICS,
+            }
+        ),
+        UserRole.VIEWER: frozenset(
+            {
                 # Read-only access
                 Permission.SCAN_READ,
                 Permission.REPORT_READ,
                 Permission.CONFIG_READ,
-                Permission.WEBHOOK_READ
+                Permission.WEBHOOK_READ,
             }
+        ),
+    }
+)
+
+_RESOURCE_PERMISSIONS: Final[Mapping[str, Tuple[Permission, ...]]] = MappingProxyType(
+    {
+        # Scan endpoints
+        "POST:/api/v1/scans": (Permission.SCAN_CREATE,),
+        "GET:/api/v1/scans": (Permission.SCAN_READ,),
+        "GET:/api/v1/scans/{scan_id}": (Permission.SCAN_READ,),
+        "DELETE:/api/v1/scans/{scan_id}": (Permission.SCAN_DELETE,),
+        "POST:/api/v1/scans/{scan_id}/run": (Permission.SCAN_RUN,),
+        # Report endpoints
+        "GET:/api/v1/reports/{scan_id}": (Permission.REPORT_READ,),
+        "POST:/api/v1/reports/export": (Permission.REPORT_EXPORT,),
+        "DELETE:/api/v1/reports/{report_id}": (Permission.REPORT_DELETE,),
+        # Configuration endpoints
+        "GET:/api/v1/config": (Permission.CONFIG_READ,),
+        "PUT:/api/v1/config": (Permission.CONFIG_WRITE,),
+        "GET:/api/v1/config/policies": (Permission.CONFIG_READ,),
+        "PUT:/api/v1/config/policies": (Permission.CONFIG_POLICY_MANAGE,),
+        # User management endpoints
+        "POST:/api/v1/users": (Permission.USER_CREATE,),
+        "GET:/api/v1/users": (Permission.USER_READ,),
+        "PUT:/api/v1/users/{user_id}": (Permission.USER_UPDATE,),
+        "DELETE:/api/v1/users/{user_id}": (Permission.USER_DELETE,),
+        # API key endpoints
+        "POST:/api/v1/auth/api-keys": (Permission.APIKEY_CREATE,),
+        "GET:/api/v1/auth/api-keys": (Permission.APIKEY_READ,),
+        "DELETE:/api/v1/auth/api-keys/{key_id}": (Permission.APIKEY_DELETE,),
+        # Webhook endpoints
+        "POST:/api/v1/webhooks": (Permission.WEBHOOK_CREATE,),
+        "GET:/api/v1/webhooks": (Permission.WEBHOOK_READ,),
+        "PUT:/api/v1/webhooks/{webhook_id}": (Permission.WEBHOOK_UPDATE,),
+        "DELETE:/api/v1/webhooks/{webhook_id}": (Permission.WEBHOOK_DELETE,),
+        # System endpoints
+        "GET:/api/v1/system/metrics": (Permission.SYSTEM_METRICS,),
+        "GET:/api/v1/system/logs": (Permission.SYSTEM_LOGS,),
+        "POST:/api/v1/system/admin": (Permission.SYSTEM_ADMIN,),
+    }
+)
+
+
+class _RouteNode:
+    """Path-segment trie node; every "{param}" segment shares the wildcard child"""
+
+    __slots__ = ("children", "wildcard", "route")
+
+    def __init__(self):
+        self.children: Dict[str, "_RouteNode"] = {}
+        self.wildcard: Optional["_RouteNode"] = None
+        self.route: Optional[Tuple[str, str]] = (
+            None  # (method, path template) ending here
+        )
+
+    def insert(self, segments: List[str], route: Tuple[str, str]) -> None:
+        node = self
+        for segment in segments:
+            if segment.startswith("{") and segment.endswith("}"):
+                if node.wildcard is None:
+                    node.wildcard = _RouteNode()
+                node = node.wildcard
+            else:
+                node = node.children.setdefault(segment, _RouteNode())
+        node.route = route
+
+    def match(self, segments: List[str], index: int = 0) -> Optional[Tuple[str, str]]:
+        """Find the route for a concrete path; literal segments beat wildcards"""
+        if index == len(segments):
+            return self.route
+
+        child = self.children.get(segments[index])
+        if child is not None:
+            route = child.match(segments, index + 1)
+            if route is not None:
+                return route
+
+        if self.wildcard is not None:
+            return self.wildcard.match(segments, index + 1)
+        return None
+
+
+def _mask(permissions) -> int:
+    """Combine permissions into a bitmask"""
+    mask = 0
+    for perm in permissions:
+        mask |= perm.bit
+    return mask
+
+
+# Permission category (value prefix) -> capability bucket name
+_CAPABILITY_BUCKETS = {
+    "scan": "scans",
+    "report": "reports",
+    "config": "config",
+    "user": "users",
+    "apikey": "api_keys",
+    "webhook": "webhooks",
+    "system": "system",
+}
+
+
+def _build_capabilities(permissions) -> Dict[str, List[str]]:
+    """Group permission actions into capability buckets"""
+    capabilities: Dict[str, List[str]] = {
+        bucket: [] for bucket in _CAPABILITY_BUCKETS.values()
+    }
+    for perm in permissions:
+        bucket = _CAPABILITY_BUCKETS.get(perm.category)
+        if bucket is not None:
+            capabilities[bucket].append(perm.action)
+    return capabilities
+
+
+def _split_path(path: str) -> List[str]:
+    """Split a URL path into segments, ignoring leading/trailing slashes"""
+    return path.strip("/").split("/")
+
+
+class RBACManager:
+    """Role-Based Access Control Manager"""
+
+    def __init__(self):
+        self.role_permissions: Dict[UserRole, FrozenSet[Permission]] = dict(
+            _ROLE_PERMISSIONS
+        )
+        self.resource_permissions: Dict[str, List[Permission]] = {
+            resource: list(perms) for resource, perms in _RESOURCE_PERMISSIONS.items()
+        }
+
+        # Derived lookup tables, kept in sync by the add_*/remove_* methods
+        self._role_permission_values: Dict[UserRole, FrozenSet[str]] = {
+            role: frozenset(perm.value for perm in perms)
+            for role, perms in self.role_permissions.items()
+        }
+        self._role_permission_tuples: Dict[UserRole, Tuple[str, ...]] = {
+            role: tuple(sorted(values))
+            for role, values in self._role_permission_values.items()
+        }
+        self._resource_perms_fast: Dict[Tuple[str, str], FrozenSet[Permission]] = {
+            tuple(resource.split(":", 1)): frozenset(perms)
+            for resource, perms in self.resource_permissions.items()
+        }
+        self._resource_perm_values: Dict[Tuple[str, str], FrozenSet[str]] = {
+            key: frozenset(perm.value for perm in perms)
+            for key, perms in self._resource_perms_fast.items()
+        }
+        self._role_masks: Dict[UserRole, int] = {
+            role: _mask(perms) for role, perms in self.role_permissions.items()
         }
-    
-    def _initialize_resource_permissions(self) -> Dict[str, List[Permission]]:
-        """Initialize resource-based permission requirements"""
-        return {
-            # Scan endpoints
-            "POST:/api/v1/scans": [Permission.SCAN_CREATE],
-            "GET:/api/v1/scans": [Permission.SCAN_READ],
-            "GET:/api/v1/scans/{scan_id}": [Permission.SCAN_READ],
-            "DELETE:/api/v1/scans/{scan_id}": [Permission.SCAN_DELETE],
-            "POST:/api/v1/scans/{scan_id}/run": [Permission.SCAN_RUN],
-            
-            # Report endpoints
-            "GET:/api/v1/reports/{scan_id}": [Permission.REPORT_READ],
-            "POST:/api/v1/reports/export": [Permission.REPORT_EXPORT],
-            "DELETE:/api/v1/reports/{report_id}": [Permission.REPORT_DELETE],
-            
-            # Configuration endpoints
-            "GET:/api/v1/config": [Permission.CONFIG_READ],
-            "PUT:/api/v1/config": [Permission.CONFIG_WRITE],
-            "GET:/api/v1/config/policies": [Permission.CONFIG_READ],
-            "PUT:/api/v1/config/policies": [Permission.CONFIG_POLICY_MANAGE],
-            
-            # User management endpoints
-            "POST:/api/v1/users": [Permission.USER_CREATE],
-            "GET:/api/v1/users": [Permission.USER_READ],
-            "PUT:/api/v1/users/{user_id}": [Permission.USER_UPDATE],
-            "DELETE:/api/v1/users/{user_id}": [Permission.USER_DELETE],
-            
-            # API key endpoints
-            "POST:/api/v1/auth/api-keys": [Permission.APIKEY_CREATE],
-            "GET:/api/v1/auth/api-keys": [Permission.APIKEY_READ],
-            "DELETE:/api/v1/auth/api-keys/{key_id}": [Permission.APIKEY_DELETE],
-            
-            # Webhook endpoints
-            "POST:/api/v1/webhooks": [Permission.WEBHOOK_CREATE],
-            "GET:/api/v1/webhooks": [Permission.WEBHOOK_READ],
-            "PUT:/api/v1/webhooks/{webhook_id}": [Permission.WEBHOOK_UPDATE],
-            "DELETE:/api/v1/webhooks/{webhook_id}": [Permission.WEBHOOK_DELETE],
-            
-            # System endpoints
-            "GET:/api/v1/system/metrics": [Permission.SYSTEM_METRICS],
-            "GET:/api/v1/system/logs": [Permission.SYSTEM_LOGS],
-            "POST:/api/v1/system/admin": [Permission.SYSTEM_ADMIN]
+        self._resource_masks: Dict[Tuple[str, str], int] = {
+            key: _mask(perms) for key, perms in self._resource_perms_fast.items()
         }
-    
+        self._role_capabilities: Dict[UserRole, Dict[str, List[str]]] = {
+            role: _build_capabilities(perms)
+            for role, perms in self.role_permissions.items()
+        }
+
+        # Per-method trie resolving concrete paths (e.g. /scans/abc) to their templates
+        self._route_trie: Dict[str, _RouteNode] = {}
+        for method, path in self._resource_perms_fast:
+            self._route_trie.setdefault(method, _RouteNode()).insert(
+                _split_path(path), (method, path)
+            )
+
+        # Access decisions are pure functions of the tables above;
+        # cleared on any mutation
+        self._access_cache = lru_cache(maxsize=4096)(self._can_access)
+
     def has_permission(self, user_role: UserRole, permission: Permission) -> bool:
         """Check if role has specific permission"""
-        return permission in self.role_permissions.get(user_role, set())
-    
+        return bool(self._role_masks.get(user_role, 0) & permission.bit)
+
     def has_permissions(self, user_role: UserRole, permissions: List[Permission]) -> bool:
         """Check if role has all specified permissions"""
-        role_perms = self.role_permissions.get(user_role, set())
-        return all(perm in role_perms for perm in permissions)
-    
+        required = _mask(permissions)
+        return self._role_masks.get(user_role, 0) & required == required
+
+    def _match_route(self, method: str, path: str) -> Optional[Tuple[str, str]]:
+        """Resolve a request to the (method, path template) key it falls under"""
+        trie = self._route_trie.get(method)
+        if trie is None:
+            return None
+        return trie.match(_split_path(path))
+
     def can_access_resource(self, user_role: UserRole, method: str, path: str) -> bool:
         """Check if role can access specific resource"""
-        resource_key = f"{method}:{path}"
-        required_permissions = self.resource_permissions.get(resource_key, [])
-        
-        if not required_permissions:
+        return self._access_cache(user_role, self._match_route(method, path))
+
+    def _can_access(
+        self, user_role: UserRole, route: Optional[Tuple[str, str]]
+    ) -> bool:
+        """Uncached access decision for a resolved route"""
+        required = self._resource_masks.get(route, 0)
+
+        if not required:
             # No specific permissions required
             return True
-        
-        return self.has_permissions(user_role, required_permissions)
-    
+
+        return self._role_masks.get(user_role, 0) & required == required
+
+    def warm_up(self) -> None:
+        """Prime the access decision cache for every role and known route template"""
+        routes = [None, *self._resource_perms_fast]
+        for role in UserRole:
+            for route in routes:
+                self._access_cache(role, route)
+
     def get_user_permissions(self, user_role: UserRole) -> List[str]:
         """Get all permissions for a user role"""
-        permissions = self.role_permissions.get(user_role, set())
-        return [perm.value for perm in permissions]
-    
+        return list(self._role_permission_values.get(user_role, frozenset()))
+
+    def get_permission_tuple(self, user_role: UserRole) -> Tuple[str, ...]:
+        """Get a role's permissions as a shared, sorted tuple (no per-call copy)"""
+        return self._role_permission_tuples.get(user_role, ())
+
     def can_user_access_resource(self, user: User, method: str, path: str) -> bool:
         """Check if specific user can access resource"""
         return self.can_access_resource(user.role, method, path)
-    
-    def filter_accessible_resources(self, user_role: UserRole, resources: List[str]) -> List[str]:
-        """Filter resources that the role can access"""
+
+    def filter_accessible_resources(
+        self, user_role: UserRole, resources: List[Union[Tuple[str, str], str]]
+    ) -> List[Union[Tuple[str, str], str]]:
+        """Filter resources that the role can access
+
+        Resources are (method, path) tuples; legacy "METHOD:path" strings are
+        still accepted.
+        """
         accessible = []
         for resource in resources:
-            if ':' in resource:
+            if isinstance(resource, str):
+                if ":" not in resource:
+                    continue
                 method, path = resource.split(':', 1)
-                if self.can_access_resource(user_role, method, path):
-                    accessible.append(resource)
+            else:
+                method, path = resource
+            if self._access_cache(user_role, self._match_route(method, path)):
+                accessible.append(resource)
         return accessible
-    
+
     def add_role_permission(self, role: UserRole, permission: Permission) -> None:
         """Add permission to role"""
-        if role not in self.role_permissions:
-            self.role_permissions[role] = set()
-        self.role_permissions[role].add(permission)
-    
+        self._set_role_permissions(
+            role, self.role_permissions.get(role, frozenset()) | {permission}
+        )
+
     def remove_role_permission(self, role: UserRole, permission: Permission) -> None:
         """Remove permission from role"""
         if role in self.role_permissions:
-            self.role_permissions[role].discard(permission)
-    
+            self._set_role_permissions(role, self.role_permissions[role] - {permission})
+
+    def _set_role_permissions(
+        self, role: UserRole, permissions: FrozenSet[Permission]
+    ) -> None:
+        """Replace a role's permission set and refresh derived tables"""
+        self.role_permissions[role] = permissions
+        self._role_permission_values[role] = frozenset(
+            perm.value for perm in permissions
+        )
+        self._role_permission_tuples[role] = tuple(
+            sorted(self._role_permission_values[role])
+        )
+        self._role_masks[role] = _mask(permissions)
+        self._role_capabilities[role] = _build_capabilities(permissions)
+        self._access_cache.cache_clear()
+
     def add_resource_permission(self, resource: str, permission: Permission) -> None:
         """Add permission requirement to resource"""
         if resource not in self.resource_permissions:
             self.resource_permissions[resource] = []
         if permission not in self.resource_permissions[resource]:
             self.resource_permissions[resource].append(permission)
-    
+
+        method, path = resource.split(":", 1)
+        required = frozenset(self.resource_permissions[resource])
+        self._resource_perms_fast[(method, path)] = required
+        self._resource_perm_values[(method, path)] = frozenset(
+            perm.value for perm in required
+        )
+        self._resource_masks[(method, path)] = _mask(required)
+        self._route_trie.setdefault(method, _RouteNode()).insert(
+            _split_path(path), (method, path)
+        )
+        self._access_cache.cache_clear()
+
     def get_role_capabilities(self, role: UserRole) -> Dict[str, List[str]]:
         """Get detailed capabilities for a role"""
-        permissions = self.role_permissions.get(role, set())
-        
-        capabilities = {
-            "scans": [],
-            "reports": [],
-            "config": [],
-            "users": [],
-            "api_keys": [],
-            "webhooks": [],
-            "system": []
-        }
-        
-        for perm in permissions:
-            perm_str = perm.value
-            if perm_str.startswith("scan:"):
-                capabilities["scans"].append(perm_str.split(":", 1)[1])
-            elif perm_str.startswith("report:"):
-                capabilities["reports"].append(perm_str.split(":", 1)[1])
-            elif perm_str.startswith("config:"):
-                capabilities["config"].append(perm_str.split(":", 1)[1])
-            elif perm_str.startswith("user:"):
-                capabilities["users"].append(perm_str.split(":", 1)[1])
-            elif perm_str.startswith("apikey:"):
-                capabilities["api_keys"].append(perm_str.split(":", 1)[1])
-            elif perm_str.startswith("webhook:"):
-                capabilities["webhooks"].append(perm_str.split(":", 1)[1])
-            elif perm_str.startswith("system:"):
-                capabilities["system"].append(perm_str.split(":", 1)[1])
-        
-        return capabilities
-    
-    def check_resource_access(self, user_permissions: List[str], method: str, path: str) -> bool:
-        """Check resource access using permission list"""
-        resource_key = f"{method}:{path}"
-        required_permissions = self.resource_permissions.get(resource_key, [])
-        
-        if not required_permissions:
+        capabilities = self._role_capabilities.get(role)
+        if capabilities is None:
+            capabilities = _build_capabilities(frozenset())
+        return {bucket: list(actions) for bucket, actions in capabilities.items()}
+
+    def check_resource_access(
+        self, user_permissions: AbstractSet[str], method: str, path: str
+    ) -> bool:
+        """Check resource access against permission values from a token or API key"""
+        required_perm_values = self._resource_perm_values.get(
+            self._match_route(method, path)
+        )
+
+        if not required_perm_values:
             return True
-        
-        required_perm_values = [perm.value for perm in required_permissions]
-        return all(perm in user_permissions for perm in required_perm_values)
\ No newline at end of file
+
+        return required_perm_values.issubset(user_permissions)
+
+
+@lru_cache(maxsize=1)
+def get_rbac() -> RBACManager:
+    """Shared RBACManager instance, usable as a FastAPI dependency"""
+    return RBACManager()
@@ -6,14 +6,17 @@ Provides REST API endpoints for scan management, authentication, and reporting.
 
 import asyncio
 import logging
+import queue
+import time
+from collections import OrderedDict, deque
 from contextlib import asynccontextmanager
+from logging.handlers import QueueHandler, QueueListener
 from datetime import datetime
 from typing import Dict, Any
 
 from fastapi import FastAPI, HTTPException, Request, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
-from fastapi.responses import JSONResponse
 import uvicorn
 
 from .routes.auth_routes import auth_router
@@ -21,7 +24,10 @@ from .routes.scan_routes import scan_router
 from .routes.report_routes import report_router
 from .routes.webhook_routes import webhook_router
 from .routes.config_routes import config_router
+from .routes import scan_routes, webhook_routes
 from .auth.api_key_auth import APIKeyAuth
+from .auth.rbac import get_rbac
+from .responses import ORJSONResponse
 
 
 # Logging configuration
@@ -32,15 +38,35 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+def start_log_listener() -> QueueListener:
+    """Move root log handlers behind a queue so request paths never block on log I/O"""
+    root_logger = logging.getLogger()
+    log_queue: queue.Queue = queue.Queue(-1)
+    listener = QueueListener(log_queue, *root_logger.handlers, respect_handler_level=True)
+    root_logger.handlers = [QueueHandler(log_queue)]
+    listener.start()
+    return listener
+
+
+def stop_log_listener(listener: QueueListener) -> None:
+    """Flush queued records and restore the original root handlers"""
+    listener.stop()
+    logging.getLogger().handlers = list(listener.handlers)
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan management"""
     # Startup
+    log_listener = start_log_listener()
     logger.info("Starting VigileGuard API server...")
     
     # Initialize services
     api_key_auth = APIKeyAuth()
     
+    # Warm up RBAC decision caches before the first request
+    get_rbac().warm_up()
+    
     # Schedule cleanup tasks
     cleanup_task = asyncio.create_task(periodic_cleanup(api_key_auth))
     
@@ -53,20 +79,27 @@ async def lifespan(app: FastAPI):
         await cleanup_task
     except asyncio.CancelledError:
         pass
+    await asyncio.gather(webhook_routes.webhook_service.aclose(),
+                         scan_routes.webhook_service.aclose())
+    stop_log_listener(log_listener)
 
 
 async def periodic_cleanup(api_key_auth: APIKeyAuth):
-    """Periodic cleanup of expired API keys"""
+    """Periodic cleanup of expired API keys and idle rate limit state"""
     while True:
         try:
             await asyncio.sleep(3600)  # Run every hour
             expired_count = api_key_auth.cleanup_expired_keys()
             if expired_count > 0:
-                logger.info(f"Cleaned up {expired_count} expired API keys")
+                logger.info("Cleaned up %s expired API keys", expired_count)
+            
+            idle_count = sweep_request_counts()
+            if idle_count > 0:
+                logger.info("Dropped rate limit state for %s idle clients", idle_count)
         except asyncio.CancelledError:
             break
         except Exception as e:
-            logger.error(f"Error during cleanup: {e}")
+            logger.error("Error during cleanup: %s", e)
 
 
 # Create FastAPI application
@@ -77,13 +110,14 @@ app = FastAPI(
     docs_url="/api/docs",
     redoc_url="/api/redoc",
     openapi_url="/api/openapi.json",
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
 # Middleware
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["http://localhost:3000", "http://127.0.0.1:3000"],  # Frontend URLs
+    allow_origin_regex=r"http://(localhost|127\.0\.0\.1):3000",  # Frontend URLs
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
     allow_headers=["*"],
@@ -99,9 +133,9 @@ app.add_middleware(
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
     """Global exception handler"""
-    logger.error(f"Unhandled exception: {exc}", exc_info=True)
+    logger.error("Unhandled exception: %s", exc, exc_info=True)
     
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
         content={
             "error": "internal_server_error",
@@ -116,60 +150,84 @@ async def global_exception_handler(request: Request, exc: Exception):
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
     """Log all API requests"""
-    start_time = datetime.utcnow()
+    start_time = time.monotonic()
+    
+    log_enabled = logger.isEnabledFor(logging.INFO)
     
     # Log request
-    logger.info(f"{request.method} {request.url} - Start")
+    if log_enabled:
+        logger.info("%s %s - Start", request.method, request.url)
     
     # Process request
     response = await call_next(request)
     
     # Log response
-    duration = (datetime.utcnow() - start_time).total_seconds()
-    logger.info(
-        f"{request.method} {request.url} - "
-        f"Status: {response.status_code} - "
-        f"Duration: {duration:.3f}s"
-    )
+    if log_enabled:
+        logger.info(
+            "%s %s - Status: %d - Duration: %.3fs",
+            request.method, request.url, response.status_code,
+            time.monotonic() - start_time
+        )
     
     return response
 
 
 # Rate limiting middleware (simple implementation)
-request_counts = {}
+RATE_LIMIT_REQUESTS = 100  # per IP
+RATE_LIMIT_WINDOW = 3600  # seconds
+MAX_TRACKED_IPS = 10_000  # least recently seen IPs are evicted beyond this
+
+# Per-IP request timestamps (oldest first), in least-recently-seen order
+request_counts: "OrderedDict[str, deque]" = OrderedDict()
 
 @app.middleware("http")
 async def rate_limit_middleware(request: Request, call_next):
     """Simple rate limiting middleware"""
     client_ip = request.client.host
-    current_time = datetime.utcnow()
+    current_time = time.time()
     
-    # Clean old entries (simple cleanup)
-    cutoff_time = current_time.timestamp() - 3600  # 1 hour
-    request_counts[client_ip] = [
-        req_time for req_time in request_counts.get(client_ip, [])
-        if req_time > cutoff_time
-    ]
+    timestamps = request_counts.get(client_ip)
+    if timestamps is None:
+        timestamps = request_counts[client_ip] = deque(maxlen=RATE_LIMIT_REQUESTS)
+        if len(request_counts) > MAX_TRACKED_IPS:
+            request_counts.popitem(last=False)
+    else:
+        request_counts.move_to_end(client_ip)
+    
+    # Drop entries that have left the window
+    cutoff_time = current_time - RATE_LIMIT_WINDOW
+    while timestamps and timestamps[0] <= cutoff_time:
+        timestamps.popleft()
     
     # Check rate limit (100 requests per hour per IP)
-    if len(request_counts.get(client_ip, [])) >= 100:
-        return JSONResponse(
+    if len(timestamps) >= RATE_LIMIT_REQUESTS:
+        return ORJSONResponse(
             status_code=status.HTTP_429_TOO_MANY_REQUESTS,
             content={
                 "error": "rate_limit_exceeded",
                 "message": "Too many requests. Please try again later.",
-                "retry_after": 3600
+                "retry_after": RATE_LIMIT_WINDOW
             }
         )
     
     # Add current request
-    if client_ip not in request_counts:
-        request_counts[client_ip] = []
-    request_counts[client_ip].append(current_time.timestamp())
+    timestamps.append(current_time)
     
     return await call_next(request)
 
 
+def sweep_request_counts() -> int:
+    """Drop rate limit entries whose newest request has left the window"""
+    cutoff_time = time.time() - RATE_LIMIT_WINDOW
+    idle_ips = [
+        client_ip for client_ip, timestamps in request_counts.items()
+        if not timestamps or timestamps[-1] <= cutoff_time
+    ]
+    for client_ip in idle_ips:
+        del request_counts[client_ip]
+    return len(idle_ips)
+
+
 # Health check endpoint
 @app.get("/health")
 async def health_check():
@@ -50,6 +50,13 @@ class APIKey:
     last_used: Optional[datetime] = None
     is_active: bool = True
     rate_limit: int = 1000  # requests per hour
+    # ISO strings for the immutable timestamps, formatted once for listings
+    _created_iso: str = field(default="", init=False, repr=False, compare=False)
+    _expires_iso: Optional[str] = field(default=None, init=False, repr=False, compare=False)
+    
+    def __post_init__(self):
+        self._created_iso = self.created_at.isoformat()
+        self._expires_iso = self.expires_at.isoformat() if self.expires_at else None
     
     @classmethod
     def generate_key(cls, name: str, user_id: str, permissions: List[str], 
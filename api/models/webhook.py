@@ -1,11 +1,46 @@
 """Webhook Models"""
 
+import sys
+import time
 from datetime import datetime
 from enum import Enum
-from typing import Dict, List, Optional, Any
+from typing import Callable, Dict, FrozenSet, List, Optional, Tuple, Any
 from dataclasses import dataclass, field
 
 
+# Circuit breaker: stop calling an endpoint after this many consecutive failures,
+# then let a single probe through every CIRCUIT_COOL_OFF seconds
+CIRCUIT_FAILURE_THRESHOLD = 5
+CIRCUIT_COOL_OFF = 60
+# Deliveries held back by an open circuit are retried until they are this old (seconds)
+CIRCUIT_DEFER_MAX_AGE = 24 * 60 * 60
+# At most this many deliveries are held back per webhook; later ones are dropped
+CIRCUIT_DEFER_MAX_ITEMS = 100
+
+# Slotted dataclasses need Python 3.10+; older interpreters fall back to __dict__
+_DATACLASS_OPTIONS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+
+def _compile_filter(key: str, expected: Any) -> Callable[[Dict[str, Any]], bool]:
+    """Build a payload matcher for one filter entry"""
+    if isinstance(expected, list):
+        try:
+            allowed = frozenset(expected)
+        except TypeError:  # unhashable filter values
+            allowed = tuple(expected)
+        
+        def matches_any(payload: Dict[str, Any]) -> bool:
+            try:
+                return payload.get(key) in allowed
+            except TypeError:  # unhashable payload value cannot equal a hashable one
+                return False
+        return matches_any
+    
+    def matches_value(payload: Dict[str, Any]) -> bool:
+        return payload.get(key) == expected
+    return matches_value
+
+
 class WebhookEvent(Enum):
     """Webhook event types"""
     SCAN_STARTED = "scan.started"
@@ -23,7 +58,7 @@ class WebhookStatus(Enum):
     FAILED = "failed"
 
 
-@dataclass
+@dataclass(**_DATACLASS_OPTIONS)
 class WebhookDelivery:
     """Webhook delivery attempt record"""
     id: str
@@ -36,13 +71,14 @@ class WebhookDelivery:
     attempt_count: int = 1
     delivered_at: Optional[datetime] = None
     created_at: datetime = field(default_factory=datetime.utcnow)
+    created_mono: float = field(default_factory=time.monotonic)  # for retry scheduling
     
     def is_successful(self) -> bool:
         """Check if delivery was successful"""
         return self.status_code is not None and 200 <= self.status_code < 300
 
 
-@dataclass  
+@dataclass(**_DATACLASS_OPTIONS)
 class Webhook:
     """Webhook configuration model"""
     id: str
@@ -71,13 +107,44 @@ class Webhook:
     delivery_count: int = 0
     success_count: int = 0
     failure_count: int = 0
+    dropped_count: int = 0  # deliveries abandoned while the circuit stayed open
+    
+    # Circuit breaker state
+    consecutive_failures: int = 0
+    circuit_open_until: float = 0.0  # time.monotonic() deadline
+    
+    # Derived from the configuration above by refresh_derived()
+    _event_set: FrozenSet[WebhookEvent] = field(default=frozenset(), init=False, repr=False, compare=False)
+    _compiled_filters: tuple = field(default=(), init=False, repr=False, compare=False)
+    event_values: Tuple[str, ...] = field(default=(), init=False, repr=False, compare=False)
+    # ISO strings for the rarely-changing timestamps, formatted once for responses
+    _created_iso: str = field(default="", init=False, repr=False, compare=False)
+    _updated_iso: str = field(default="", init=False, repr=False, compare=False)
+    
+    def __post_init__(self):
+        self._created_iso = self.created_at.isoformat()
+        self._updated_iso = self.updated_at.isoformat()
+        self.refresh_derived()
+    
+    def touch(self) -> None:
+        """Mark the webhook configuration as updated now"""
+        self.updated_at = datetime.utcnow()
+        self._updated_iso = self.updated_at.isoformat()
+    
+    def refresh_derived(self) -> None:
+        """Rebuild lookup structures; call after changing events or filters"""
+        self._event_set = frozenset(self.events)
+        self.event_values = tuple(event.value for event in self.events)
+        self._compiled_filters = tuple(
+            _compile_filter(key, value) for key, value in self.filters.items()
+        )
     
     def should_trigger(self, event: WebhookEvent, payload: Dict[str, Any]) -> bool:
         """Check if webhook should trigger for given event and payload"""
         if self.status != WebhookStatus.ACTIVE:
             return False
         
-        if event not in self.events:
+        if event not in self._event_set:
             return False
         
         # Apply filters if configured
@@ -88,13 +155,8 @@ class Webhook:
     
     def _matches_filters(self, payload: Dict[str, Any]) -> bool:
         """Check if payload matches configured filters"""
-        for filter_key, filter_value in self.filters.items():
-            payload_value = payload.get(filter_key)
-            
-            if isinstance(filter_value, list):
-                if payload_value not in filter_value:
-                    return False
-            elif payload_value != filter_value:
+        for matches in self._compiled_filters:
+            if not matches(payload):
                 return False
         
         return True
@@ -106,13 +168,38 @@ class Webhook:
         
         if success:
             self.success_count += 1
+            self.consecutive_failures = 0
+            self.circuit_open_until = 0.0
         else:
             self.failure_count += 1
+            self.consecutive_failures += 1
+            if self.consecutive_failures >= CIRCUIT_FAILURE_THRESHOLD:
+                self.circuit_open_until = time.monotonic() + CIRCUIT_COOL_OFF
             
         # Disable webhook if too many consecutive failures
         if self.failure_count > 10 and self.success_count == 0:
             self.status = WebhookStatus.FAILED
     
+    def circuit_open(self) -> bool:
+        """Check whether the circuit breaker is holding deliveries back right now"""
+        return (
+            self.consecutive_failures >= CIRCUIT_FAILURE_THRESHOLD
+            and time.monotonic() < self.circuit_open_until
+        )
+    
+    def allow_delivery(self) -> bool:
+        """Check circuit breaker; after cool-off a single probe delivery is let through"""
+        if self.consecutive_failures < CIRCUIT_FAILURE_THRESHOLD:
+            return True
+        
+        now = time.monotonic()
+        if now < self.circuit_open_until:
+            return False
+        
+        # Half-open: hold other deliveries back until the probe resolves
+        self.circuit_open_until = now + CIRCUIT_COOL_OFF
+        return True
+    
     def get_success_rate(self) -> float:
         """Calculate webhook success rate"""
         if self.delivery_count == 0:
@@ -0,0 +1,17 @@
+"""Shared response classes for the VigileGuard API"""
+
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+
+
+class ORJSONResponse(JSONResponse):
+    """JSON response rendered with orjson
+
+    Local replacement for ``fastapi.responses.ORJSONResponse``, which newer FastAPI
+    releases deprecate.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
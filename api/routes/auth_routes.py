@@ -1,15 +1,23 @@
 """Authentication API Routes"""
 
+import hashlib
+import hmac
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Any
 from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel, Field
 
 from ..auth.jwt_handler import JWTHandler
 from ..auth.api_key_auth import APIKeyAuth
-from ..auth.rbac import RBACManager
+from ..auth.rbac import RBACManager, Permission, get_rbac
 from ..models.user import User, UserRole, APIKey
+from ..responses import ORJSONResponse
 
 
 # Pydantic models for API requests/responses
@@ -48,14 +56,19 @@ class APIKeyResponse(BaseModel):
 
 
 # Initialize authentication components
-auth_router = APIRouter(prefix="/auth", tags=["authentication"])
+auth_router = APIRouter(prefix="/auth", tags=["authentication"], default_response_class=ORJSONResponse)
 jwt_handler = JWTHandler()
 api_key_auth = APIKeyAuth()
-rbac_manager = RBACManager()
 security = HTTPBearer()
 
+# Short-lived cache of verified token claims, keyed by token digest
+JWT_CACHE_TTL = 5
+JWT_CACHE_MAXSIZE = 10_000
+_jwt_cache: "OrderedDict[bytes, tuple]" = OrderedDict()
+_jwt_cache_lock = threading.Lock()
+
 # In-memory user store (replace with database in production)
-users_db = {
+users_db: Mapping[str, User] = MappingProxyType({
     "admin": User(
         id="user_001",
         username="admin",
@@ -64,13 +77,59 @@ users_db = {
         created_at=datetime.utcnow(),
         password_hash="$2b$12$dummy_hash_for_demo"  # Use proper password hashing
     )
-}
+})
+# Index by user id; replace both views together if users are ever added at runtime
+users_by_id: Mapping[str, User] = MappingProxyType({u.id: u for u in users_db.values()})
+
+# Demo credential; replace with a bcrypt check against User.password_hash in production
+DEMO_PASSWORD = b"admin123"
+
+# Login response user_info per user id, rebuilt when role or permissions change
+_user_static_info: Dict[str, Dict[str, Any]] = {}
 
 
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> User:
+def _cached_claims(key: bytes) -> Optional[Dict[str, Any]]:
+    """Return claims cached for a token digest if they have not expired"""
+    with _jwt_cache_lock:
+        entry = _jwt_cache.get(key)
+        if entry is None:
+            return None
+        if entry[0] > time.time():
+            _jwt_cache.move_to_end(key)
+            return entry[1]
+        del _jwt_cache[key]
+    return None
+
+
+def _verify_and_cache(token: str, key: bytes) -> Optional[Dict[str, Any]]:
+    """Verify a JWT and cache its claims for a few seconds"""
+    user_info = jwt_handler.extract_user_info(token)
+    if user_info:
+        ttl = JWT_CACHE_TTL
+        if user_info.get("exp") is not None:
+            # exp is on JWTHandler's utcnow()-based clock; convert to time remaining
+            ttl = min(ttl, user_info["exp"] - datetime.utcnow().timestamp())
+        expires = time.time() + ttl
+        with _jwt_cache_lock:
+            _jwt_cache[key] = (expires, user_info)
+            if len(_jwt_cache) > JWT_CACHE_MAXSIZE:
+                _jwt_cache.popitem(last=False)
+    return user_info
+
+
+async def _verify_cached(token: str) -> Optional[Dict[str, Any]]:
+    """Verify a JWT, reusing claims verified within the last few seconds"""
+    key = hashlib.sha256(token.encode()).digest()
+    user_info = _cached_claims(key)
+    if user_info is None:
+        user_info = await run_in_threadpool(_verify_and_cache, token, key)
+    return user_info
+
+
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> User:
     """Extract current user from JWT token"""
     token = credentials.credentials
-    user_info = jwt_handler.extract_user_info(token)
+    user_info = await _verify_cached(token)
     
     if not user_info:
         raise HTTPException(
@@ -79,11 +138,7 @@ def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(securit
         )
     
     # Find user in database
-    user = None
-    for u in users_db.values():
-        if u.id == user_info["user_id"]:
-            user = u
-            break
+    user = users_by_id.get(user_info["user_id"])
     
     if not user:
         raise HTTPException(
@@ -94,7 +149,7 @@ def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(securit
     return user
 
 
-def get_api_key_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> Dict[str, Any]:
+async def get_api_key_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> Dict[str, Any]:
     """Extract user info from API key"""
     raw_key = credentials.credentials
     
@@ -104,6 +159,8 @@ def get_api_key_user(credentials: HTTPAuthorizationCredentials = Depends(securit
             detail="Invalid API key format"
         )
     
+    # Kept on the event loop: a single sha256 plus dict lookups, and the rate
+    # limiter and last_used bookkeeping behind it are not thread-safe
     auth_result = api_key_auth.authenticate_request(raw_key)
     
     if not auth_result or not auth_result.get("authenticated"):
@@ -116,20 +173,66 @@ def get_api_key_user(credentials: HTTPAuthorizationCredentials = Depends(securit
     return auth_result
 
 
-def verify_permission(permission: str):
-    """Dependency to verify user has specific permission"""
-    def permission_checker(user: User = Depends(get_current_user)) -> User:
-        if not rbac_manager.has_permission(user.role, permission):
+def _check_password(password: str) -> bool:
+    """Verify a password in constant time
+
+    Cheap enough to run inline; move it to the threadpool once it becomes a real
+    KDF such as bcrypt.
+    """
+    return hmac.compare_digest(password.encode("utf-8"), DEMO_PASSWORD)
+
+
+def _login_user_info(user: User, permissions: tuple) -> Dict[str, Any]:
+    """Return the cached user_info block for login/refresh responses"""
+    info = _user_static_info.get(user.id)
+    if (info is None or info["permissions"] is not permissions
+            or info["role"] != user.role.value or info["email"] != user.email):
+        info = {
+            "id": user.id,
+            "username": user.username,
+            "email": user.email,
+            "role": user.role.value,
+            "permissions": permissions
+        }
+        _user_static_info[user.id] = info
+    return info
+
+
+class PermissionChecker:
+    """Dependency verifying the current user's role grants a permission"""
+    
+    __slots__ = ('permission',)
+    
+    def __init__(self, permission: Permission):
+        self.permission = permission
+    
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, PermissionChecker) and other.permission is self.permission
+    
+    def __hash__(self) -> int:
+        return hash((PermissionChecker, self.permission))
+    
+    # async so FastAPI runs it inline on the event loop rather than on the threadpool
+    async def __call__(self, user: User = Depends(get_current_user),
+                       rbac: RBACManager = Depends(get_rbac)) -> User:
+        if not rbac.has_permission(user.role, self.permission):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
-                detail=f"Permission denied: {permission}"
+                detail=f"Permission denied: {self.permission.value}"
             )
         return user
-    return permission_checker
+
+
+def verify_permission(permission: Permission) -> PermissionChecker:
+    """Dependency to verify user has specific permission"""
+    return PermissionChecker(permission)
 
 
 @auth_router.post("/login", response_model=LoginResponse)
-async def login(login_data: LoginRequest):
+async def login(
+    login_data: LoginRequest,
+    rbac: RBACManager = Depends(get_rbac)
+):
     """Authenticate user and return JWT tokens"""
     
     # Find user (simple lookup for demo - use proper authentication in production)
@@ -141,7 +244,7 @@ async def login(login_data: LoginRequest):
         )
     
     # Verify password (simplified for demo)
-    if login_data.password != "admin123":  # Use proper password verification
+    if not _check_password(login_data.password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid username or password"
@@ -151,30 +254,27 @@ async def login(login_data: LoginRequest):
     user.last_login = datetime.utcnow()
     
     # Create tokens
-    permissions = rbac_manager.get_user_permissions(user.role)
-    access_token = jwt_handler.create_access_token(
-        user.id, user.username, user.role.value, permissions
+    permissions = rbac.get_permission_tuple(user.role)
+    access_token = await run_in_threadpool(
+        jwt_handler.create_access_token, user.id, user.username, user.role.value, permissions
     )
-    refresh_token = jwt_handler.create_refresh_token(user.id)
+    refresh_token = await run_in_threadpool(jwt_handler.create_refresh_token, user.id)
     
-    return LoginResponse(
+    return LoginResponse.model_construct(
         access_token=access_token,
         refresh_token=refresh_token,
-        user_info={
-            "id": user.id,
-            "username": user.username,
-            "email": user.email,
-            "role": user.role.value,
-            "permissions": permissions
-        }
+        user_info=_login_user_info(user, permissions)
     )
 
 
 @auth_router.post("/refresh", response_model=LoginResponse)
-async def refresh_token(refresh_data: RefreshRequest):
+async def refresh_token(
+    refresh_data: RefreshRequest,
+    rbac: RBACManager = Depends(get_rbac)
+):
     """Refresh access token using refresh token"""
     
-    user_info = jwt_handler.extract_user_info(refresh_data.refresh_token)
+    user_info = await _verify_cached(refresh_data.refresh_token)
     if not user_info or user_info.get("token_type") != "refresh":
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -182,11 +282,7 @@ async def refresh_token(refresh_data: RefreshRequest):
         )
     
     # Find user
-    user = None
-    for u in users_db.values():
-        if u.id == user_info["user_id"]:
-            user = u
-            break
+    user = users_by_id.get(user_info["user_id"])
     
     if not user:
         raise HTTPException(
@@ -195,34 +291,29 @@ async def refresh_token(refresh_data: RefreshRequest):
         )
     
     # Create new tokens
-    permissions = rbac_manager.get_user_permissions(user.role)
-    access_token = jwt_handler.create_access_token(
-        user.id, user.username, user.role.value, permissions
+    permissions = rbac.get_permission_tuple(user.role)
+    access_token = await run_in_threadpool(
+        jwt_handler.create_access_token, user.id, user.username, user.role.value, permissions
     )
-    new_refresh_token = jwt_handler.create_refresh_token(user.id)
+    new_refresh_token = await run_in_threadpool(jwt_handler.create_refresh_token, user.id)
     
-    return LoginResponse(
+    return LoginResponse.model_construct(
         access_token=access_token,
         refresh_token=new_refresh_token,
-        user_info={
-            "id": user.id,
-            "username": user.username,
-            "email": user.email,
-            "role": user.role.value,
-            "permissions": permissions
-        }
+        user_info=_login_user_info(user, permissions)
     )
 
 
 @auth_router.post("/api-keys", response_model=APIKeyResponse)
 async def create_api_key(
     key_data: APIKeyCreateRequest,
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    rbac: RBACManager = Depends(get_rbac)
 ):
     """Create new API key"""
     
     # Verify user can create API keys
-    if not rbac_manager.has_permission(current_user.role, "apikey:create"):
+    if not rbac.has_permission(current_user.role, Permission.APIKEY_CREATE):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Permission denied: cannot create API keys"
@@ -236,22 +327,25 @@ async def create_api_key(
         key_data.expires_days
     )
     
-    return APIKeyResponse(
+    return APIKeyResponse.model_construct(
         id=api_key.id,
         name=api_key.name,
         key=raw_key,  # Only returned on creation
         permissions=api_key.permissions,
-        created_at=api_key.created_at.isoformat(),
-        expires_at=api_key.expires_at.isoformat() if api_key.expires_at else None,
+        created_at=api_key._created_iso,
+        expires_at=api_key._expires_iso,
         is_active=api_key.is_active
     )
 
 
 @auth_router.get("/api-keys", response_model=List[APIKeyResponse])
-async def list_api_keys(current_user: User = Depends(get_current_user)):
+async def list_api_keys(
+    current_user: User = Depends(get_current_user),
+    rbac: RBACManager = Depends(get_rbac)
+):
     """List user's API keys"""
     
-    if not rbac_manager.has_permission(current_user.role, "apikey:read"):
+    if not rbac.has_permission(current_user.role, Permission.APIKEY_READ):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Permission denied: cannot read API keys"
@@ -259,13 +353,14 @@ async def list_api_keys(current_user: User = Depends(get_current_user)):
     
     api_keys = api_key_auth.list_user_keys(current_user.id)
     
+    construct = APIKeyResponse.model_construct
     return [
-        APIKeyResponse(
+        construct(
             id=key.id,
             name=key.name,
             permissions=key.permissions,
-            created_at=key.created_at.isoformat(),
-            expires_at=key.expires_at.isoformat() if key.expires_at else None,
+            created_at=key._created_iso,
+            expires_at=key._expires_iso,
             last_used=key.last_used.isoformat() if key.last_used else None,
             is_active=key.is_active
         )
@@ -276,21 +371,19 @@ async def list_api_keys(current_user: User = Depends(get_current_user)):
 @auth_router.delete("/api-keys/{key_id}")
 async def revoke_api_key(
     key_id: str,
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    rbac: RBACManager = Depends(get_rbac)
 ):
     """Revoke API key"""
     
-    if not rbac_manager.has_permission(current_user.role, "apikey:delete"):
+    if not rbac.has_permission(current_user.role, Permission.APIKEY_DELETE):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Permission denied: cannot delete API keys"
         )
     
     # Check if key belongs to user (or user is admin)
-    api_keys = api_key_auth.list_user_keys(current_user.id)
-    key_exists = any(key.id == key_id for key in api_keys)
-    
-    if not key_exists and current_user.role != UserRole.ADMIN:
+    if not api_key_auth.user_owns_key(current_user.id, key_id) and current_user.role != UserRole.ADMIN:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="API key not found"
@@ -307,11 +400,14 @@ async def revoke_api_key(
 
 
 @auth_router.get("/me")
-async def get_current_user_info(current_user: User = Depends(get_current_user)):
+async def get_current_user_info(
+    current_user: User = Depends(get_current_user),
+    rbac: RBACManager = Depends(get_rbac)
+):
     """Get current user information"""
     
-    permissions = rbac_manager.get_user_permissions(current_user.role)
-    capabilities = rbac_manager.get_role_capabilities(current_user.role)
+    permissions = rbac.get_permission_tuple(current_user.role)
+    capabilities = rbac.get_role_capabilities(current_user.role)
     
     return {
         "id": current_user.id,
@@ -320,8 +416,8 @@ async def get_current_user_info(current_user: User = Depends(get_current_user)):
         "role": current_user.role.value,
         "permissions": permissions,
         "capabilities": capabilities,
-        "created_at": current_user.created_at.isoformat(),
-        "last_login": current_user.last_login.isoformat() if current_user.last_login else None,
+        "created_at": current_user.created_at,
+        "last_login": current_user.last_login,
         "is_active": current_user.is_active
     }
 
@@ -1,12 +1,26 @@
 """Configuration Management API Routes"""
 
-from typing import Dict, List, Optional, Any
-from fastapi import APIRouter, HTTPException, Depends, status
+import hashlib
+import secrets
+import threading
+from datetime import datetime
+from types import MappingProxyType
+from typing import Callable, Dict, List, Mapping, Optional, Any, Tuple
+
+import yaml
+from fastapi import APIRouter, HTTPException, Depends, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel, Field
 
-from ..auth.rbac import RBACManager, Permission
+from ..auth.rbac import Permission
 from ..models.user import User
-from .auth_routes import get_current_user
+from ..responses import ORJSONResponse
+from .auth_routes import PermissionChecker
+
+
+# Prefer the libyaml-backed C implementations when PyYAML was built with them
+_YAML_DUMPER = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
 
 
 # Pydantic models for API requests/responses
@@ -44,8 +58,7 @@ class PolicyCreateRequest(BaseModel):
 
 
 # Initialize components
-config_router = APIRouter(prefix="/config", tags=["configuration"])
-rbac_manager = RBACManager()
+config_router = APIRouter(prefix="/config", tags=["configuration"], default_response_class=ORJSONResponse)
 
 # Mock configuration storage (replace with database in production)
 system_config = {
@@ -129,71 +142,126 @@ system_config = {
     }
 }
 
-policies = {}
+# Copy-on-write: writers swap in a new read-only view under _policies_lock,
+# so readers never see a dict change size mid-iteration
+policies: Mapping[str, Dict[str, Any]] = MappingProxyType({})
+_policies_lock = threading.Lock()
+
+# Bumped on every system_config mutation; keys the serialized-config caches
+_config_version = 0
+_config_yaml_cache: Tuple[int, str] = (-1, "")
+_config_etag_cache: Tuple[int, str] = (-1, "")
+_config_response_cache: Tuple[int, Optional[ConfigResponse]] = (-1, None)
+
+_CONFIG_SECTIONS = ("checkers", "severity_thresholds", "notifications", "api_settings", "system_settings")
+_VALID_CHECKERS = frozenset({"ssh", "firewall", "web_server", "file_permissions"})
+_REQUIRED_SEVERITIES = ("critical", "high", "medium", "low")
+
+
+def _update_policies(mutate: Callable[[Dict[str, Dict[str, Any]]], Any]) -> Any:
+    """Apply mutate() to a copy of the policy table and publish the result"""
+    global policies
+    with _policies_lock:
+        updated = dict(policies)
+        result = mutate(updated)
+        policies = MappingProxyType(updated)
+    return result
+
+
+def _bump_config_version() -> None:
+    """Invalidate cached serializations of system_config"""
+    global _config_version
+    _config_version += 1
+
+
+def _config_yaml() -> str:
+    """Return system_config as YAML, re-serializing only after a change"""
+    global _config_yaml_cache
+    if _config_yaml_cache[0] != _config_version:
+        _config_yaml_cache = (
+            _config_version,
+            yaml.dump(system_config, Dumper=_YAML_DUMPER, default_flow_style=False)
+        )
+    return _config_yaml_cache[1]
+
+
+def _config_etag() -> str:
+    """Return an ETag for system_config derived from its content
+
+    Hashing the serialized config rather than using _config_version keeps tags
+    consistent across workers and restarts, where the counter starts over.
+    """
+    global _config_etag_cache
+    if _config_etag_cache[0] != _config_version:
+        digest = hashlib.sha256(_config_yaml().encode("utf-8")).hexdigest()
+        _config_etag_cache = (_config_version, f'W/"cfg-{digest}"')
+    return _config_etag_cache[1]
+
+
+def _config_response() -> ConfigResponse:
+    """Return a ConfigResponse for system_config, rebuilt only after a change"""
+    global _config_response_cache
+    if _config_response_cache[0] != _config_version:
+        _config_response_cache = (_config_version, ConfigResponse.model_construct(
+            checkers=system_config["checkers"],
+            severity_thresholds=system_config["severity_thresholds"],
+            notifications=system_config["notifications"],
+            api_settings=system_config["api_settings"],
+            system_settings=system_config["system_settings"]
+        ))
+    return _config_response_cache[1]
 
 
-def require_config_permission(permission: Permission):
+def require_config_permission(permission: Permission) -> PermissionChecker:
     """Dependency to check configuration permissions"""
-    def permission_checker(current_user: User = Depends(get_current_user)) -> User:
-        if not rbac_manager.has_permission(current_user.role, permission):
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail=f"Permission denied: {permission.value}"
-            )
-        return current_user
-    return permission_checker
+    return PermissionChecker(permission)
+
+
+REQUIRE_CONFIG_READ = require_config_permission(Permission.CONFIG_READ)
+REQUIRE_CONFIG_WRITE = require_config_permission(Permission.CONFIG_WRITE)
+REQUIRE_POLICY_MANAGE = require_config_permission(Permission.CONFIG_POLICY_MANAGE)
 
 
 @config_router.get("/", response_model=ConfigResponse)
 async def get_configuration(
-    current_user: User = Depends(require_config_permission(Permission.CONFIG_READ))
+    request: Request,
+    response: Response,
+    current_user: User = Depends(REQUIRE_CONFIG_READ)
 ):
     """Get system configuration"""
     
-    return ConfigResponse(
-        checkers=system_config["checkers"],
-        severity_thresholds=system_config["severity_thresholds"],
-        notifications=system_config["notifications"],
-        api_settings=system_config["api_settings"],
-        system_settings=system_config["system_settings"]
-    )
+    etag = _config_etag()
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    
+    response.headers["ETag"] = etag
+    return _config_response()
 
 
 @config_router.put("/", response_model=ConfigResponse)
 async def update_configuration(
     config_data: ConfigUpdateRequest,
-    current_user: User = Depends(require_config_permission(Permission.CONFIG_WRITE))
+    current_user: User = Depends(REQUIRE_CONFIG_WRITE)
 ):
     """Update system configuration"""
     
     # Update configuration sections
-    if config_data.checkers is not None:
-        system_config["checkers"].update(config_data.checkers)
-    
-    if config_data.severity_thresholds is not None:
-        system_config["severity_thresholds"].update(config_data.severity_thresholds)
-    
-    if config_data.notifications is not None:
-        system_config["notifications"].update(config_data.notifications)
+    changed = False
+    for section in _CONFIG_SECTIONS:
+        value = getattr(config_data, section)
+        if value is not None:
+            system_config[section].update(value)
+            changed = True
     
-    if config_data.api_settings is not None:
-        system_config["api_settings"].update(config_data.api_settings)
+    if changed:
+        _bump_config_version()
     
-    if config_data.system_settings is not None:
-        system_config["system_settings"].update(config_data.system_settings)
-    
-    return ConfigResponse(
-        checkers=system_config["checkers"],
-        severity_thresholds=system_config["severity_thresholds"],
-        notifications=system_config["notifications"],
-        api_settings=system_config["api_settings"],
-        system_settings=system_config["system_settings"]
-    )
+    return _config_response()
 
 
 @config_router.get("/checkers")
 async def get_checker_config(
-    current_user: User = Depends(require_config_permission(Permission.CONFIG_READ))
+    current_user: User = Depends(REQUIRE_CONFIG_READ)
 ):
     """Get security checker configuration"""
     
@@ -227,11 +295,12 @@ async def get_checker_config(
 @config_router.put("/checkers")
 async def update_checker_config(
     checker_config: Dict[str, Any],
-    current_user: User = Depends(require_config_permission(Permission.CONFIG_WRITE))
+    current_user: User = Depends(REQUIRE_CONFIG_WRITE)
 ):
     """Update security checker configuration"""
     
     system_config["checkers"].update(checker_config)
+    _bump_config_version()
     
     return {
         "message": "Checker configuration updated successfully",
@@ -241,12 +310,12 @@ async def update_checker_config(
 
 @config_router.get("/policies", response_model=List[PolicyResponse])
 async def list_policies(
-    current_user: User = Depends(require_config_permission(Permission.CONFIG_READ))
+    current_user: User = Depends(REQUIRE_CONFIG_READ)
 ):
     """List security policies"""
     
     return [
-        PolicyResponse(
+        PolicyResponse.model_construct(
             id=policy_id,
             name=policy["name"],
             description=policy["description"],
@@ -262,27 +331,31 @@ async def list_policies(
 @config_router.post("/policies", response_model=PolicyResponse)
 async def create_policy(
     policy_data: PolicyCreateRequest,
-    current_user: User = Depends(require_config_permission(Permission.CONFIG_POLICY_MANAGE))
+    current_user: User = Depends(REQUIRE_POLICY_MANAGE)
 ):
     """Create security policy"""
     
-    from datetime import datetime
-    import uuid
-    
-    policy_id = f"policy_{uuid.uuid4().hex[:8]}"
+    now_iso = datetime.utcnow().isoformat()
     policy = {
         "name": policy_data.name,
         "description": policy_data.description,
         "rules": policy_data.rules,
         "enabled": policy_data.enabled,
-        "created_at": datetime.utcnow().isoformat(),
-        "updated_at": datetime.utcnow().isoformat(),
+        "created_at": now_iso,
+        "updated_at": now_iso,
         "created_by": current_user.id
     }
     
-    policies[policy_id] = policy
+    def insert(table: Dict[str, Dict[str, Any]]) -> str:
+        new_id = f"policy_{secrets.token_hex(4)}"
+        while new_id in table:
+            new_id = f"policy_{secrets.token_hex(4)}"
+        table[new_id] = policy
+        return new_id
+    
+    policy_id = _update_policies(insert)
     
-    return PolicyResponse(
+    return PolicyResponse.model_construct(
         id=policy_id,
         name=policy["name"],
         description=policy["description"],
@@ -296,7 +369,7 @@ async def create_policy(
 @config_router.get("/policies/{policy_id}", response_model=PolicyResponse)
 async def get_policy(
     policy_id: str,
-    current_user: User = Depends(require_config_permission(Permission.CONFIG_READ))
+    current_user: User = Depends(REQUIRE_CONFIG_READ)
 ):
     """Get security policy details"""
     
@@ -307,7 +380,7 @@ async def get_policy(
             detail="Policy not found"
         )
     
-    return PolicyResponse(
+    return PolicyResponse.model_construct(
         id=policy_id,
         name=policy["name"],
         description=policy["description"],
@@ -322,27 +395,34 @@ async def get_policy(
 async def update_policy(
     policy_id: str,
     policy_data: PolicyCreateRequest,
-    current_user: User = Depends(require_config_permission(Permission.CONFIG_POLICY_MANAGE))
+    current_user: User = Depends(REQUIRE_POLICY_MANAGE)
 ):
     """Update security policy"""
     
-    policy = policies.get(policy_id)
+    updated_at = datetime.utcnow().isoformat()
+    
+    def replace(table: Dict[str, Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        current = table.get(policy_id)
+        if current is None:
+            return None
+        table[policy_id] = {
+            **current,
+            "name": policy_data.name,
+            "description": policy_data.description,
+            "rules": policy_data.rules,
+            "enabled": policy_data.enabled,
+            "updated_at": updated_at
+        }
+        return table[policy_id]
+    
+    policy = _update_policies(replace)
     if not policy:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Policy not found"
         )
     
-    from datetime import datetime
-    
-    # Update policy
-    policy["name"] = policy_data.name
-    policy["description"] = policy_data.description
-    policy["rules"] = policy_data.rules
-    policy["enabled"] = policy_data.enabled
-    policy["updated_at"] = datetime.utcnow().isoformat()
-    
-    return PolicyResponse(
+    return PolicyResponse.model_construct(
         id=policy_id,
         name=policy["name"],
         description=policy["description"],
@@ -356,55 +436,55 @@ async def update_policy(
 @config_router.delete("/policies/{policy_id}")
 async def delete_policy(
     policy_id: str,
-    current_user: User = Depends(require_config_permission(Permission.CONFIG_POLICY_MANAGE))
+    current_user: User = Depends(REQUIRE_POLICY_MANAGE)
 ):
     """Delete security policy"""
     
-    if policy_id not in policies:
+    if _update_policies(lambda table: table.pop(policy_id, None)) is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Policy not found"
         )
     
-    del policies[policy_id]
-    
     return {"message": "Policy deleted successfully"}
 
 
 @config_router.post("/validate")
 async def validate_configuration(
     config_data: ConfigUpdateRequest,
-    current_user: User = Depends(require_config_permission(Permission.CONFIG_READ))
+    current_user: User = Depends(REQUIRE_CONFIG_READ)
 ):
     """Validate configuration without applying changes"""
     
+    warnings: List[str] = []
+    errors: List[str] = []
     validation_results = {
         "valid": True,
-        "warnings": [],
-        "errors": []
+        "warnings": warnings,
+        "errors": errors
     }
     
     # Validate checkers
     if config_data.checkers:
-        for checker_name, checker_config in config_data.checkers.items():
-            if checker_name not in ["ssh", "firewall", "web_server", "file_permissions"]:
-                validation_results["warnings"].append(f"Unknown checker: {checker_name}")
-            
-            if not isinstance(checker_config, dict):
-                validation_results["errors"].append(f"Invalid configuration for checker: {checker_name}")
-                validation_results["valid"] = False
+        checkers = config_data.checkers
+        warnings.extend(f"Unknown checker: {name}" for name in checkers if name not in _VALID_CHECKERS)
+        errors.extend(
+            f"Invalid configuration for checker: {name}"
+            for name, checker_config in checkers.items() if not isinstance(checker_config, dict)
+        )
     
     # Validate severity thresholds
     if config_data.severity_thresholds:
-        required_severities = ["critical", "high", "medium", "low"]
-        for severity in required_severities:
-            if severity not in config_data.severity_thresholds:
-                validation_results["warnings"].append(f"Missing severity threshold: {severity}")
-        
-        for severity, threshold in config_data.severity_thresholds.items():
-            if not isinstance(threshold, int) or threshold < 0:
-                validation_results["errors"].append(f"Invalid threshold for {severity}: must be non-negative integer")
-                validation_results["valid"] = False
+        thresholds = config_data.severity_thresholds
+        warnings.extend(
+            f"Missing severity threshold: {severity}"
+            for severity in _REQUIRED_SEVERITIES if severity not in thresholds
+        )
+        errors.extend(
+            f"Invalid threshold for {severity}: must be non-negative integer"
+            for severity, threshold in thresholds.items()
+            if not isinstance(threshold, int) or threshold < 0
+        )
     
     # Validate API settings
     if config_data.api_settings:
@@ -412,26 +492,20 @@ async def validate_configuration(
             rate_config = config_data.api_settings["rate_limiting"]
             if "requests_per_hour" in rate_config:
                 if not isinstance(rate_config["requests_per_hour"], int) or rate_config["requests_per_hour"] <= 0:
-                    validation_results["errors"].append("requests_per_hour must be positive integer")
-                    validation_results["valid"] = False
+                    errors.append("requests_per_hour must be positive integer")
     
+    validation_results["valid"] = not errors
     return validation_results
 
 
 @config_router.get("/export")
 async def export_configuration(
-    current_user: User = Depends(require_config_permission(Permission.CONFIG_READ))
+    current_user: User = Depends(REQUIRE_CONFIG_READ)
 ):
     """Export current configuration as YAML"""
     
-    import yaml
-    from io import StringIO
-    
-    config_yaml = StringIO()
-    yaml.dump(system_config, config_yaml, default_flow_style=False)
-    
     return {
-        "config_yaml": config_yaml.getvalue(),
+        "config_yaml": _config_yaml(),
         "exported_at": datetime.utcnow().isoformat(),
         "exported_by": current_user.username
     }
@@ -440,13 +514,12 @@ async def export_configuration(
 @config_router.post("/import")
 async def import_configuration(
     config_yaml: str,
-    current_user: User = Depends(require_config_permission(Permission.CONFIG_WRITE))
+    current_user: User = Depends(REQUIRE_CONFIG_WRITE)
 ):
     """Import configuration from YAML"""
     
     try:
-        import yaml
-        imported_config = yaml.safe_load(config_yaml)
+        imported_config = await run_in_threadpool(yaml.load, config_yaml, Loader=_YAML_LOADER)
         
         # Validate imported configuration
         if not isinstance(imported_config, dict):
@@ -457,6 +530,7 @@ async def import_configuration(
         
         # Update system configuration
         system_config.update(imported_config)
+        _bump_config_version()
         
         return {
             "message": "Configuration imported successfully",
@@ -7,7 +7,7 @@ from fastapi import APIRouter, HTTPException, Depends, status, BackgroundTasks
 from fastapi.responses import FileResponse
 from pydantic import BaseModel, Field
 
-from ..auth.rbac import RBACManager, Permission
+from ..auth.rbac import RBACManager, Permission, get_rbac
 from ..models.user import User
 from ..models.report import Report, ReportFormat, ReportStatus, ComplianceFramework
 from ..services.report_service import ReportService
@@ -55,13 +55,13 @@ class ReportExportRequest(BaseModel):
 # Initialize components
 report_router = APIRouter(prefix="/reports", tags=["reports"])
 report_service = ReportService()
-rbac_manager = RBACManager()
 
 
 def require_report_permission(permission: Permission):
     """Dependency to check report permissions"""
-    def permission_checker(current_user: User = Depends(get_current_user)) -> User:
-        if not rbac_manager.has_permission(current_user.role, permission):
+    def permission_checker(current_user: User = Depends(get_current_user),
+                           rbac: RBACManager = Depends(get_rbac)) -> User:
+        if not rbac.has_permission(current_user.role, permission):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail=f"Permission denied: {permission.value}"
@@ -120,7 +120,8 @@ async def list_reports(
     offset: int = 0,
     format_filter: Optional[ReportFormat] = None,
     status_filter: Optional[ReportStatus] = None,
-    current_user: User = Depends(require_report_permission(Permission.REPORT_READ))
+    current_user: User = Depends(require_report_permission(Permission.REPORT_READ)),
+    rbac: RBACManager = Depends(get_rbac)
 ):
     """List reports"""
     
@@ -131,7 +132,7 @@ async def list_reports(
         filters["status"] = status_filter
     
     # Users can only see their own reports unless admin
-    if not rbac_manager.has_permission(current_user.role, Permission.SYSTEM_ADMIN):
+    if not rbac.has_permission(current_user.role, Permission.SYSTEM_ADMIN):
         filters["created_by"] = current_user.id
     
     reports = await report_service.list_reports(limit, offset, filters)
@@ -162,7 +163,8 @@ async def list_reports(
 @report_router.get("/{report_id}", response_model=ReportResponse)
 async def get_report(
     report_id: str,
-    current_user: User = Depends(require_report_permission(Permission.REPORT_READ))
+    current_user: User = Depends(require_report_permission(Permission.REPORT_READ)),
+    rbac: RBACManager = Depends(get_rbac)
 ):
     """Get report details"""
     
@@ -174,7 +176,7 @@ async def get_report(
         )
     
     # Check ownership or admin access
-    if report.created_by != current_user.id and not rbac_manager.has_permission(current_user.role, Permission.SYSTEM_ADMIN):
+    if report.created_by != current_user.id and not rbac.has_permission(current_user.role, Permission.SYSTEM_ADMIN):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Access denied to this report"
@@ -203,7 +205,8 @@ async def get_report(
 @report_router.get("/{report_id}/download")
 async def download_report(
     report_id: str,
-    current_user: User = Depends(require_report_permission(Permission.REPORT_READ))
+    current_user: User = Depends(require_report_permission(Permission.REPORT_READ)),
+    rbac: RBACManager = Depends(get_rbac)
 ):
     """Download report file"""
     
@@ -215,7 +218,7 @@ async def download_report(
         )
     
     # Check ownership or admin access
-    if report.created_by != current_user.id and not rbac_manager.has_permission(current_user.role, Permission.SYSTEM_ADMIN):
+    if report.created_by != current_user.id and not rbac.has_permission(current_user.role, Permission.SYSTEM_ADMIN):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Access denied to this report"
@@ -279,7 +282,8 @@ async def export_report(
 @report_router.delete("/{report_id}")
 async def delete_report(
     report_id: str,
-    current_user: User = Depends(require_report_permission(Permission.REPORT_DELETE))
+    current_user: User = Depends(require_report_permission(Permission.REPORT_DELETE)),
+    rbac: RBACManager = Depends(get_rbac)
 ):
     """Delete a report"""
     
@@ -291,7 +295,7 @@ async def delete_report(
         )
     
     # Check ownership or admin access
-    if report.created_by != current_user.id and not rbac_manager.has_permission(current_user.role, Permission.SYSTEM_ADMIN):
+    if report.created_by != current_user.id and not rbac.has_permission(current_user.role, Permission.SYSTEM_ADMIN):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Access denied to delete this report"
@@ -311,7 +315,8 @@ async def delete_report(
 async def get_compliance_report(
     report_id: str,
     framework: ComplianceFramework,
-    current_user: User = Depends(require_report_permission(Permission.REPORT_READ))
+    current_user: User = Depends(require_report_permission(Permission.REPORT_READ)),
+    rbac: RBACManager = Depends(get_rbac)
 ):
     """Get compliance-specific report view"""
     
@@ -323,7 +328,7 @@ async def get_compliance_report(
         )
     
     # Check ownership or admin access
-    if report.created_by != current_user.id and not rbac_manager.has_permission(current_user.role, Permission.SYSTEM_ADMIN):
+    if report.created_by != current_user.id and not rbac.has_permission(current_user.role, Permission.SYSTEM_ADMIN):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Access denied to this report"
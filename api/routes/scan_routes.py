@@ -6,7 +6,7 @@ from typing import Dict, List, Optional, Any
 from fastapi import APIRouter, HTTPException, Depends, status, BackgroundTasks
 from pydantic import BaseModel, Field
 
-from ..auth.rbac import RBACManager, Permission
+from ..auth.rbac import RBACManager, Permission, get_rbac
 from ..models.user import User
 from ..models.scan import Scan, ScanStatus, ScanResult, SeverityLevel
 from ..services.scan_service import ScanService
@@ -76,13 +76,13 @@ class ScanDetailResponse(BaseModel):
 scan_router = APIRouter(prefix="/scans", tags=["scans"])
 scan_service = ScanService()
 webhook_service = WebhookService()
-rbac_manager = RBACManager()
 
 
 def require_scan_permission(permission: Permission):
     """Dependency to check scan permissions"""
-    def permission_checker(current_user: User = Depends(get_current_user)) -> User:
-        if not rbac_manager.has_permission(current_user.role, permission):
+    def permission_checker(current_user: User = Depends(get_current_user),
+                           rbac: RBACManager = Depends(get_rbac)) -> User:
+        if not rbac.has_permission(current_user.role, permission):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail=f"Permission denied: {permission.value}"
@@ -159,16 +159,17 @@ async def list_scans(
     offset: int = 0,
     status: Optional[ScanStatus] = None,
     created_by: Optional[str] = None,
-    current_user: User = Depends(require_scan_permission(Permission.SCAN_READ))
+    current_user: User = Depends(require_scan_permission(Permission.SCAN_READ)),
+    rbac: RBACManager = Depends(get_rbac)
 ):
     """List security scans"""
     
     filters = {}
     if status:
         filters["status"] = status
-    if created_by and (created_by == current_user.id or rbac_manager.has_permission(current_user.role, Permission.SYSTEM_ADMIN)):
+    if created_by and (created_by == current_user.id or rbac.has_permission(current_user.role, Permission.SYSTEM_ADMIN)):
         filters["created_by"] = created_by
-    elif not rbac_manager.has_permission(current_user.role, Permission.SYSTEM_ADMIN):
+    elif not rbac.has_permission(current_user.role, Permission.SYSTEM_ADMIN):
         filters["created_by"] = current_user.id  # Users can only see their own scans
     
     scans = await scan_service.list_scans(limit, offset, filters)
@@ -197,7 +198,8 @@ async def list_scans(
 @scan_router.get("/{scan_id}", response_model=ScanDetailResponse)
 async def get_scan(
     scan_id: str,
-    current_user: User = Depends(require_scan_permission(Permission.SCAN_READ))
+    current_user: User = Depends(require_scan_permission(Permission.SCAN_READ)),
+    rbac: RBACManager = Depends(get_rbac)
 ):
     """Get scan details with results"""
     
@@ -209,7 +211,7 @@ async def get_scan(
         )
     
     # Check ownership or admin access
-    if scan.created_by != current_user.id and not rbac_manager.has_permission(current_user.role, Permission.SYSTEM_ADMIN):
+    if scan.created_by != current_user.id and not rbac.has_permission(current_user.role, Permission.SYSTEM_ADMIN):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Access denied to this scan"
@@ -251,7 +253,8 @@ async def get_scan(
 async def run_scan(
     scan_id: str,
     background_tasks: BackgroundTasks,
-    current_user: User = Depends(require_scan_permission(Permission.SCAN_RUN))
+    current_user: User = Depends(require_scan_permission(Permission.SCAN_RUN)),
+    rbac: RBACManager = Depends(get_rbac)
 ):
     """Start scan execution"""
     
@@ -263,7 +266,7 @@ async def run_scan(
         )
     
     # Check ownership or run permission
-    if scan.created_by != current_user.id and not rbac_manager.has_permission(current_user.role, Permission.SYSTEM_ADMIN):
+    if scan.created_by != current_user.id and not rbac.has_permission(current_user.role, Permission.SYSTEM_ADMIN):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Access denied to run this scan"
@@ -293,7 +296,8 @@ async def run_scan(
 @scan_router.delete("/{scan_id}")
 async def delete_scan(
     scan_id: str,
-    current_user: User = Depends(require_scan_permission(Permission.SCAN_DELETE))
+    current_user: User = Depends(require_scan_permission(Permission.SCAN_DELETE)),
+    rbac: RBACManager = Depends(get_rbac)
 ):
     """Delete a scan"""
     
@@ -305,7 +309,7 @@ async def delete_scan(
         )
     
     # Check ownership or admin access
-    if scan.created_by != current_user.id and not rbac_manager.has_permission(current_user.role, Permission.SYSTEM_ADMIN):
+    if scan.created_by != current_user.id and not rbac.has_permission(current_user.role, Permission.SYSTEM_ADMIN):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Access denied to delete this scan"
@@ -331,7 +335,8 @@ async def delete_scan(
 @scan_router.post("/{scan_id}/cancel")
 async def cancel_scan(
     scan_id: str,
-    current_user: User = Depends(require_scan_permission(Permission.SCAN_RUN))
+    current_user: User = Depends(require_scan_permission(Permission.SCAN_RUN)),
+    rbac: RBACManager = Depends(get_rbac)
 ):
     """Cancel a running scan"""
     
@@ -343,7 +348,7 @@ async def cancel_scan(
         )
     
     # Check ownership or admin access
-    if scan.created_by != current_user.id and not rbac_manager.has_permission(current_user.role, Permission.SYSTEM_ADMIN):
+    if scan.created_by != current_user.id and not rbac.has_permission(current_user.role, Permission.SYSTEM_ADMIN):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Access denied to cancel this scan"
@@ -371,7 +376,8 @@ async def get_scan_results(
     scan_id: str,
     severity: Optional[SeverityLevel] = None,
     status_filter: Optional[str] = None,
-    current_user: User = Depends(require_scan_permission(Permission.SCAN_READ))
+    current_user: User = Depends(require_scan_permission(Permission.SCAN_READ)),
+    rbac: RBACManager = Depends(get_rbac)
 ):
     """Get scan results with optional filtering"""
     
@@ -383,7 +389,7 @@ async def get_scan_results(
         )
     
     # Check ownership or admin access
-    if scan.created_by != current_user.id and not rbac_manager.has_permission(current_user.role, Permission.SYSTEM_ADMIN):
+    if scan.created_by != current_user.id and not rbac.has_permission(current_user.role, Permission.SYSTEM_ADMIN):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Access denied to this scan"
@@ -415,7 +421,8 @@ async def get_scan_results(
 @scan_router.get("/{scan_id}/summary")
 async def get_scan_summary(
     scan_id: str,
-    current_user: User = Depends(require_scan_permission(Permission.SCAN_READ))
+    current_user: User = Depends(require_scan_permission(Permission.SCAN_READ)),
+    rbac: RBACManager = Depends(get_rbac)
 ):
     """Get scan summary statistics"""
     
@@ -427,7 +434,7 @@ async def get_scan_summary(
         )
     
     # Check ownership or admin access
-    if scan.created_by != current_user.id and not rbac_manager.has_permission(current_user.role, Permission.SYSTEM_ADMIN):
+    if scan.created_by != current_user.id and not rbac.has_permission(current_user.role, Permission.SYSTEM_ADMIN):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Access denied to this scan"
@@ -1,21 +1,36 @@
 """Webhook Management API Routes"""
 
-from datetime import datetime
+import hashlib
+import secrets
+from functools import lru_cache
 from typing import Dict, List, Optional, Any
-from fastapi import APIRouter, HTTPException, Depends, status
-from pydantic import BaseModel, Field, HttpUrl
 
-from ..auth.rbac import RBACManager, Permission
+import orjson
+from fastapi import APIRouter, HTTPException, Depends, Request, Response, status
+from pydantic import AfterValidator, BaseModel, ConfigDict, Field, HttpUrl
+from typing_extensions import Annotated
+
+from ..auth.rbac import RBACManager, Permission, get_rbac
 from ..models.user import User
 from ..models.webhook import Webhook, WebhookEvent, WebhookStatus
+from ..responses import ORJSONResponse
 from ..services.webhook_service import WebhookService
-from .auth_routes import get_current_user
+from .auth_routes import PermissionChecker, get_current_user
+
+
+# Validated as an HttpUrl, then kept as the normalized string the models store
+WebhookURL = Annotated[HttpUrl, AfterValidator(str)]
+
+# Request bodies are read once and never mutated
+_REQUEST_MODEL_CONFIG = ConfigDict(extra='ignore', frozen=True)
 
 
 # Pydantic models for API requests/responses
 class WebhookCreateRequest(BaseModel):
+    model_config = _REQUEST_MODEL_CONFIG
+    
     name: str = Field(..., min_length=1, max_length=100)
-    url: HttpUrl
+    url: WebhookURL
     events: List[WebhookEvent]
     secret: Optional[str] = Field(None, min_length=8, max_length=256)
     headers: Dict[str, str] = Field(default_factory=dict)
@@ -26,8 +41,10 @@ class WebhookCreateRequest(BaseModel):
 
 
 class WebhookUpdateRequest(BaseModel):
+    model_config = _REQUEST_MODEL_CONFIG
+    
     name: Optional[str] = Field(None, min_length=1, max_length=100)
-    url: Optional[HttpUrl] = None
+    url: Optional[WebhookURL] = None
     events: Optional[List[WebhookEvent]] = None
     status: Optional[WebhookStatus] = None
     secret: Optional[str] = Field(None, min_length=8, max_length=256)
@@ -60,6 +77,7 @@ class WebhookStatsResponse(BaseModel):
     total_deliveries: int
     successful_deliveries: int
     failed_deliveries: int
+    dropped_deliveries: int = 0
     success_rate: float
     last_triggered: Optional[str] = None
     events: List[str]
@@ -68,21 +86,27 @@ class WebhookStatsResponse(BaseModel):
 
 
 class SlackWebhookRequest(BaseModel):
+    model_config = _REQUEST_MODEL_CONFIG
+    
     name: str = Field(..., min_length=1, max_length=100)
-    webhook_url: HttpUrl
+    webhook_url: WebhookURL
     events: List[WebhookEvent]
     channel: str = Field("#security", min_length=1, max_length=100)
 
 
 class TeamsWebhookRequest(BaseModel):
+    model_config = _REQUEST_MODEL_CONFIG
+    
     name: str = Field(..., min_length=1, max_length=100)
-    webhook_url: HttpUrl
+    webhook_url: WebhookURL
     events: List[WebhookEvent]
 
 
 class DiscordWebhookRequest(BaseModel):
+    model_config = _REQUEST_MODEL_CONFIG
+    
     name: str = Field(..., min_length=1, max_length=100)
-    webhook_url: HttpUrl
+    webhook_url: WebhookURL
     events: List[WebhookEvent]
 
 
@@ -97,33 +121,101 @@ class WebhookTestResponse(BaseModel):
 # Initialize components
 webhook_router = APIRouter(prefix="/webhooks", tags=["webhooks"])
 webhook_service = WebhookService()
-rbac_manager = RBACManager()
 
 
-def require_webhook_permission(permission: Permission):
-    """Dependency to check webhook permissions"""
-    def permission_checker(current_user: User = Depends(get_current_user)) -> User:
-        if not rbac_manager.has_permission(current_user.role, permission):
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail=f"Permission denied: {permission.value}"
-            )
-        return current_user
-    return permission_checker
+_EVENT_DESCRIPTIONS: Dict[WebhookEvent, str] = {
+    WebhookEvent.SCAN_STARTED: "Triggered when a security scan starts",
+    WebhookEvent.SCAN_COMPLETED: "Triggered when a security scan completes successfully",
+    WebhookEvent.SCAN_FAILED: "Triggered when a security scan fails",
+    WebhookEvent.CRITICAL_FINDING: "Triggered when critical security issues are found",
+    WebhookEvent.HIGH_FINDING: "Triggered when high severity issues are found",
+    WebhookEvent.COMPLIANCE_CHANGE: "Triggered when compliance status changes"
+}
+
+# The event catalogue is fixed for the life of the process
+_EVENT_TYPES_RESPONSE: Dict[str, List[Dict[str, str]]] = {
+    "events": [
+        {
+            "name": event.value,
+            "description": _EVENT_DESCRIPTIONS.get(event, "No description available")
+        }
+        for event in WebhookEvent
+    ]
+}
+_EVENT_TYPES_BODY = orjson.dumps(_EVENT_TYPES_RESPONSE)
+_EVENT_TYPES_ETAG = f'"{hashlib.blake2b(_EVENT_TYPES_BODY, digest_size=8).hexdigest()}"'
+_EVENT_TYPES_HEADERS = {"ETag": _EVENT_TYPES_ETAG, "Cache-Control": "public, max-age=3600"}
+
+
+def _webhook_to_dict(webhook: Webhook) -> Dict[str, Any]:
+    """Plain-dict API representation of a webhook, in WebhookResponse field order"""
+    return {
+        "id": webhook.id,
+        "name": webhook.name,
+        "url": webhook.url,
+        "events": list(webhook.event_values),
+        "status": webhook.status.value,
+        "created_at": webhook._created_iso,
+        "updated_at": webhook._updated_iso,
+        "last_triggered": webhook.last_triggered.isoformat() if webhook.last_triggered else None,
+        "delivery_count": webhook.delivery_count,
+        "success_count": webhook.success_count,
+        "failure_count": webhook.failure_count,
+        "success_rate": webhook.get_success_rate()
+    }
+
+
+def _webhook_to_response(webhook: Webhook) -> WebhookResponse:
+    """Build the API representation of a webhook"""
+    return WebhookResponse.model_construct(**_webhook_to_dict(webhook))
+
+
+@lru_cache(maxsize=None)
+def require_webhook_permission(permission: Permission) -> PermissionChecker:
+    """Dependency to check webhook permissions (one shared instance per permission)"""
+    return PermissionChecker(permission)
+
+
+async def get_owned_webhook(webhook_id: str,
+                            current_user: User = Depends(get_current_user),
+                            rbac: RBACManager = Depends(get_rbac)) -> Webhook:
+    """Dependency resolving a webhook the current user owns (admins may access any)"""
+    webhook = await webhook_service.get_webhook(webhook_id)
+    if not webhook:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Webhook not found"
+        )
+    
+    if webhook.user_id != current_user.id and not rbac.has_permission(current_user.role, Permission.SYSTEM_ADMIN):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied to this webhook"
+        )
+    
+    return webhook
+
+
+# Dependency aliases shared by the route signatures below
+WebhookCreator = Annotated[User, Depends(require_webhook_permission(Permission.WEBHOOK_CREATE))]
+WebhookReader = Annotated[User, Depends(require_webhook_permission(Permission.WEBHOOK_READ))]
+WebhookUpdater = Annotated[User, Depends(require_webhook_permission(Permission.WEBHOOK_UPDATE))]
+WebhookDeleter = Annotated[User, Depends(require_webhook_permission(Permission.WEBHOOK_DELETE))]
+OwnedWebhook = Annotated[Webhook, Depends(get_owned_webhook)]
 
 
 @webhook_router.post("/", response_model=WebhookResponse)
 async def create_webhook(
     webhook_data: WebhookCreateRequest,
-    current_user: User = Depends(require_webhook_permission(Permission.WEBHOOK_CREATE))
+    current_user: WebhookCreator
 ):
     """Create a new webhook"""
     
     # Create webhook object
     webhook = Webhook(
-        id=f"webhook_{current_user.id}_{datetime.utcnow().timestamp()}",
+        id=f"webhook_{secrets.token_hex(12)}",
         name=webhook_data.name,
-        url=str(webhook_data.url),
+        url=webhook_data.url,
         events=webhook_data.events,
         user_id=current_user.id,
         secret=webhook_data.secret,
@@ -137,165 +229,62 @@ async def create_webhook(
     # Register webhook
     webhook_id = await webhook_service.register_webhook(webhook)
     
-    return WebhookResponse(
-        id=webhook.id,
-        name=webhook.name,
-        url=webhook.url,
-        events=[event.value for event in webhook.events],
-        status=webhook.status.value,
-        created_at=webhook.created_at.isoformat(),
-        updated_at=webhook.updated_at.isoformat(),
-        last_triggered=webhook.last_triggered.isoformat() if webhook.last_triggered else None,
-        delivery_count=webhook.delivery_count,
-        success_count=webhook.success_count,
-        failure_count=webhook.failure_count,
-        success_rate=webhook.get_success_rate()
-    )
+    return _webhook_to_response(webhook)
 
 
-@webhook_router.get("/", response_model=List[WebhookResponse])
+@webhook_router.get("/", response_model=List[WebhookResponse], response_class=ORJSONResponse)
 async def list_webhooks(
-    current_user: User = Depends(require_webhook_permission(Permission.WEBHOOK_READ))
+    current_user: WebhookReader
 ):
     """List user's webhooks"""
     
     webhooks = await webhook_service.list_webhooks(current_user.id)
     
-    return [
-        WebhookResponse(
-            id=webhook.id,
-            name=webhook.name,
-            url=webhook.url,
-            events=[event.value for event in webhook.events],
-            status=webhook.status.value,
-            created_at=webhook.created_at.isoformat(),
-            updated_at=webhook.updated_at.isoformat(),
-            last_triggered=webhook.last_triggered.isoformat() if webhook.last_triggered else None,
-            delivery_count=webhook.delivery_count,
-            success_count=webhook.success_count,
-            failure_count=webhook.failure_count,
-            success_rate=webhook.get_success_rate()
-        )
-        for webhook in webhooks
-    ]
+    # Built from trusted data: encode plain dicts with orjson rather than creating
+    # and re-validating a model per webhook
+    return ORJSONResponse([_webhook_to_dict(webhook) for webhook in webhooks])
 
 
 @webhook_router.get("/{webhook_id}", response_model=WebhookResponse)
 async def get_webhook(
-    webhook_id: str,
-    current_user: User = Depends(require_webhook_permission(Permission.WEBHOOK_READ))
+    current_user: WebhookReader,
+    webhook: OwnedWebhook
 ):
     """Get webhook details"""
     
-    webhook = await webhook_service.get_webhook(webhook_id)
-    if not webhook:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Webhook not found"
-        )
-    
-    # Check ownership (or admin)
-    if webhook.user_id != current_user.id and not rbac_manager.has_permission(current_user.role, Permission.SYSTEM_ADMIN):
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Access denied to this webhook"
-        )
-    
-    return WebhookResponse(
-        id=webhook.id,
-        name=webhook.name,
-        url=webhook.url,
-        events=[event.value for event in webhook.events],
-        status=webhook.status.value,
-        created_at=webhook.created_at.isoformat(),
-        updated_at=webhook.updated_at.isoformat(),
-        last_triggered=webhook.last_triggered.isoformat() if webhook.last_triggered else None,
-        delivery_count=webhook.delivery_count,
-        success_count=webhook.success_count,
-        failure_count=webhook.failure_count,
-        success_rate=webhook.get_success_rate()
-    )
+    return _webhook_to_response(webhook)
 
 
 @webhook_router.put("/{webhook_id}", response_model=WebhookResponse)
 async def update_webhook(
-    webhook_id: str,
     webhook_data: WebhookUpdateRequest,
-    current_user: User = Depends(require_webhook_permission(Permission.WEBHOOK_UPDATE))
+    current_user: WebhookUpdater,
+    webhook: OwnedWebhook
 ):
     """Update webhook configuration"""
     
-    webhook = await webhook_service.get_webhook(webhook_id)
-    if not webhook:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Webhook not found"
-        )
-    
-    # Check ownership
-    if webhook.user_id != current_user.id and not rbac_manager.has_permission(current_user.role, Permission.SYSTEM_ADMIN):
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Access denied to this webhook"
-        )
-    
     # Prepare updates
-    updates = {}
-    for field, value in webhook_data.dict(exclude_unset=True).items():
-        if value is not None:
-            if field == "url":
-                updates[field] = str(value)
-            else:
-                updates[field] = value
+    updates = webhook_data.model_dump(exclude_unset=True, exclude_none=True)
     
     # Update webhook
-    success = await webhook_service.update_webhook(webhook_id, updates)
-    if not success:
+    updated_webhook = await webhook_service.update_webhook(webhook.id, updates)
+    if not updated_webhook:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Failed to update webhook"
         )
     
-    # Return updated webhook
-    updated_webhook = await webhook_service.get_webhook(webhook_id)
-    return WebhookResponse(
-        id=updated_webhook.id,
-        name=updated_webhook.name,
-        url=updated_webhook.url,
-        events=[event.value for event in updated_webhook.events],
-        status=updated_webhook.status.value,
-        created_at=updated_webhook.created_at.isoformat(),
-        updated_at=updated_webhook.updated_at.isoformat(),
-        last_triggered=updated_webhook.last_triggered.isoformat() if updated_webhook.last_triggered else None,
-        delivery_count=updated_webhook.delivery_count,
-        success_count=updated_webhook.success_count,
-        failure_count=updated_webhook.failure_count,
-        success_rate=updated_webhook.get_success_rate()
-    )
+    return _webhook_to_response(updated_webhook)
 
 
 @webhook_router.delete("/{webhook_id}")
 async def delete_webhook(
-    webhook_id: str,
-    current_user: User = Depends(require_webhook_permission(Permission.WEBHOOK_DELETE))
+    current_user: WebhookDeleter,
+    webhook: OwnedWebhook
 ):
     """Delete webhook"""
     
-    webhook = await webhook_service.get_webhook(webhook_id)
-    if not webhook:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Webhook not found"
-        )
-    
-    # Check ownership
-    if webhook.user_id != current_user.id and not rbac_manager.has_permission(current_user.role, Permission.SYSTEM_ADMIN):
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Access denied to this webhook"
-        )
-    
-    success = await webhook_service.delete_webhook(webhook_id)
+    success = await webhook_service.delete_webhook(webhook.id)
     if not success:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -307,27 +296,13 @@ async def delete_webhook(
 
 @webhook_router.post("/{webhook_id}/test", response_model=WebhookTestResponse)
 async def test_webhook(
-    webhook_id: str,
-    current_user: User = Depends(require_webhook_permission(Permission.WEBHOOK_UPDATE))
+    current_user: WebhookUpdater,
+    webhook: OwnedWebhook
 ):
     """Send test webhook delivery"""
     
-    webhook = await webhook_service.get_webhook(webhook_id)
-    if not webhook:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Webhook not found"
-        )
-    
-    # Check ownership
-    if webhook.user_id != current_user.id and not rbac_manager.has_permission(current_user.role, Permission.SYSTEM_ADMIN):
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Access denied to this webhook"
-        )
-    
     # Send test webhook
-    result = await webhook_service.test_webhook(webhook_id)
+    result = await webhook_service.test_webhook(webhook.id)
     
     return WebhookTestResponse(
         delivery_id=result["delivery_id"],
@@ -340,146 +315,78 @@ async def test_webhook(
 
 @webhook_router.get("/{webhook_id}/stats", response_model=WebhookStatsResponse)
 async def get_webhook_stats(
-    webhook_id: str,
-    current_user: User = Depends(require_webhook_permission(Permission.WEBHOOK_READ))
+    current_user: WebhookReader,
+    webhook: OwnedWebhook
 ):
     """Get webhook delivery statistics"""
     
-    webhook = await webhook_service.get_webhook(webhook_id)
-    if not webhook:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Webhook not found"
-        )
-    
-    # Check ownership
-    if webhook.user_id != current_user.id and not rbac_manager.has_permission(current_user.role, Permission.SYSTEM_ADMIN):
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Access denied to this webhook"
-        )
-    
-    stats = await webhook_service.get_webhook_stats(webhook_id)
+    stats = await webhook_service.get_webhook_stats(webhook.id)
     if not stats:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Webhook statistics not found"
         )
     
-    return WebhookStatsResponse(**stats)
+    return WebhookStatsResponse.model_construct(**stats)
 
 
 # Platform-specific webhook creation endpoints
 @webhook_router.post("/slack", response_model=WebhookResponse)
 async def create_slack_webhook(
     slack_data: SlackWebhookRequest,
-    current_user: User = Depends(require_webhook_permission(Permission.WEBHOOK_CREATE))
+    current_user: WebhookCreator
 ):
     """Create Slack-specific webhook with proper formatting"""
     
-    webhook_id = await webhook_service.create_slack_webhook(
+    webhook = await webhook_service.create_slack_webhook(
         current_user.id,
         slack_data.name,
-        str(slack_data.webhook_url),
+        slack_data.webhook_url,
         slack_data.events,
         slack_data.channel
     )
     
-    webhook = await webhook_service.get_webhook(webhook_id)
-    return WebhookResponse(
-        id=webhook.id,
-        name=webhook.name,
-        url=webhook.url,
-        events=[event.value for event in webhook.events],
-        status=webhook.status.value,
-        created_at=webhook.created_at.isoformat(),
-        updated_at=webhook.updated_at.isoformat(),
-        last_triggered=webhook.last_triggered.isoformat() if webhook.last_triggered else None,
-        delivery_count=webhook.delivery_count,
-        success_count=webhook.success_count,
-        failure_count=webhook.failure_count,
-        success_rate=webhook.get_success_rate()
-    )
+    return _webhook_to_response(webhook)
 
 
 @webhook_router.post("/teams", response_model=WebhookResponse)
 async def create_teams_webhook(
     teams_data: TeamsWebhookRequest,
-    current_user: User = Depends(require_webhook_permission(Permission.WEBHOOK_CREATE))
+    current_user: WebhookCreator
 ):
     """Create Microsoft Teams-specific webhook"""
     
-    webhook_id = await webhook_service.create_teams_webhook(
+    webhook = await webhook_service.create_teams_webhook(
         current_user.id,
         teams_data.name,
-        str(teams_data.webhook_url),
+        teams_data.webhook_url,
         teams_data.events
     )
     
-    webhook = await webhook_service.get_webhook(webhook_id)
-    return WebhookResponse(
-        id=webhook.id,
-        name=webhook.name,
-        url=webhook.url,
-        events=[event.value for event in webhook.events],
-        status=webhook.status.value,
-        created_at=webhook.created_at.isoformat(),
-        updated_at=webhook.updated_at.isoformat(),
-        last_triggered=webhook.last_triggered.isoformat() if webhook.last_triggered else None,
-        delivery_count=webhook.delivery_count,
-        success_count=webhook.success_count,
-        failure_count=webhook.failure_count,
-        success_rate=webhook.get_success_rate()
-    )
+    return _webhook_to_response(webhook)
 
 
 @webhook_router.post("/discord", response_model=WebhookResponse)
 async def create_discord_webhook(
     discord_data: DiscordWebhookRequest,
-    current_user: User = Depends(require_webhook_permission(Permission.WEBHOOK_CREATE))
+    current_user: WebhookCreator
 ):
     """Create Discord-specific webhook"""
     
-    webhook_id = await webhook_service.create_discord_webhook(
+    webhook = await webhook_service.create_discord_webhook(
         current_user.id,
         discord_data.name,
-        str(discord_data.webhook_url),
+        discord_data.webhook_url,
         discord_data.events
     )
     
-    webhook = await webhook_service.get_webhook(webhook_id)
-    return WebhookResponse(
-        id=webhook.id,
-        name=webhook.name,
-        url=webhook.url,
-        events=[event.value for event in webhook.events],
-        status=webhook.status.value,
-        created_at=webhook.created_at.isoformat(),
-        updated_at=webhook.updated_at.isoformat(),
-        last_triggered=webhook.last_triggered.isoformat() if webhook.last_triggered else None,
-        delivery_count=webhook.delivery_count,
-        success_count=webhook.success_count,
-        failure_count=webhook.failure_count,
-        success_rate=webhook.get_success_rate()
-    )
+    return _webhook_to_response(webhook)
 
 
 @webhook_router.get("/events/types")
-async def list_webhook_events():
+async def list_webhook_events(request: Request):
     """List available webhook event types"""
-    return {
-        "events": [
-            {
-                "name": event.value,
-                "description": {
-                    WebhookEvent.SCAN_STARTED: "Triggered when a security scan starts",
-                    WebhookEvent.SCAN_COMPLETED: "Triggered when a security scan completes successfully",
-                    WebhookEvent.SCAN_FAILED: "Triggered when a security scan fails",
-                    WebhookEvent.CRITICAL_FINDING: "Triggered when critical security issues are found",
-                    WebhookEvent.HIGH_FINDING: "Triggered when high severity issues are found",
-                    WebhookEvent.COMPLIANCE_CHANGE: "Triggered when compliance status changes"
-                }.get(event, "No description available")
-            }
-            for event in WebhookEvent
-        ]
-    }
\ No newline at end of file
+    if request.headers.get("if-none-match") == _EVENT_TYPES_ETAG:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=_EVENT_TYPES_HEADERS)
+    return Response(content=_EVENT_TYPES_BODY, media_type="application/json",
+                    headers=_EVENT_TYPES_HEADERS)
@@ -3,24 +3,49 @@ VigileGuard Security Audit Engine - Setup Script
 Phase 3: API & CI/CD Integration
 """
 
-from setuptools import setup, find_packages
+from functools import lru_cache
+from setuptools import setup
 import os
+import re
 
-# Read README file
-with open("README.md", "r", encoding="utf-8") as fh:
-    long_description = fh.read()
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+_VERSION_RE = re.compile(r'^__version__\s*=\s*(["\'])([^"\']+)\1', re.M)
+# One requirement per line; blank lines, comment lines and trailing comments are dropped
+_REQUIREMENT_RE = re.compile(r'^[ \t]*([^#\s][^#\n]*?)[ \t]*(?:#.*)?$', re.M)
+
+
+@lru_cache(maxsize=1)
+def get_version():
+    """Read __version__ from the package without importing it"""
+    with open(os.path.join(HERE, "vigileguard", "__init__.py"), "r", encoding="utf-8") as fh:
+        match = _VERSION_RE.search(fh.read())
+    if not match:
+        raise RuntimeError("Unable to find __version__ in vigileguard/__init__.py")
+    return match.group(2)
+
+
+@lru_cache(maxsize=1)
+def get_long_description():
+    """Read README file"""
+    with open(os.path.join(HERE, "README.md"), "r", encoding="utf-8") as fh:
+        return fh.read()
+
+
+@lru_cache(maxsize=1)
+def get_requirements():
+    """Read requirements"""
+    with open(os.path.join(HERE, "requirements.txt"), "r", encoding="utf-8") as fh:
+        return _REQUIREMENT_RE.findall(fh.read())
 
-# Read requirements
-with open("requirements.txt", "r", encoding="utf-8") as fh:
-    requirements = [line.strip() for line in fh if line.strip() and not line.startswith("#")]
 
 setup(
     name="vigileguard",
-    version="3.0.7",
+    version=get_version(),
     author="VigileGuard Team",
     author_email="team@vigileguard.com",
     description="Comprehensive Security Audit Engine with API & CI/CD Integration",
-    long_description=long_description,
+    long_description=get_long_description(),
     long_description_content_type="text/markdown",
     url="https://github.com/navinnm/VigileGuard",
     project_urls={
@@ -44,9 +69,10 @@ setup(
         "Operating System :: POSIX :: Linux",
         "Operating System :: Unix",
     ],
-    packages=find_packages(),
+    # pyproject.toml's [tool.setuptools] packages takes precedence; keep in sync
+    packages=["vigileguard"],
     python_requires=">=3.8",
-    install_requires=requirements,
+    install_requires=get_requirements(),
     extras_require={
         "dev": [
             "pytest>=7.0.0",
@@ -58,13 +84,14 @@ setup(
         "api": [
             "fastapi>=0.104.0",
             "uvicorn>=0.24.0",
+            "uvloop>=0.17.0; sys_platform != 'win32'",
             "pydantic>=2.0.0",
+            "orjson>=3.8.0",
             "python-multipart>=0.0.6",
             "aiofiles>=23.0.7",
             "httpx>=0.25.0",
         ],
         "ci": [
-            "requests>=2.28.0",
             "pyyaml>=6.0.1",
         ]
     },
@@ -0,0 +1,756 @@
+#!/usr/bin/env python3
+"""
+VigileGuard API Test Suite
+Tests for the API service internals (webhooks, auth, rate limiting)
+"""
+
+import asyncio
+import copy
+import hashlib
+import hmac
+import json
+import os
+import sys
+import time
+import unittest
+from collections import deque
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import httpx
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+from fastapi.testclient import TestClient
+
+# Add the parent directory to the path so we can import our modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import api.main as api_main
+from api.routes import auth_routes, config_routes, webhook_routes
+from api.auth.jwt_handler import JWTHandler
+from api.auth.rbac import Permission, RBACManager, get_rbac
+from api.models import webhook as webhook_model
+from api.models.webhook import (
+    CIRCUIT_COOL_OFF,
+    CIRCUIT_DEFER_MAX_ITEMS,
+    CIRCUIT_FAILURE_THRESHOLD,
+    Webhook,
+    WebhookDelivery,
+    WebhookEvent,
+)
+from api.models.user import User, UserRole
+from api.services.webhook_service import WebhookService
+
+
+class FakeClock:
+    """Stand-in for time.monotonic that only moves when told to"""
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestWebhookCircuitBreaker(unittest.TestCase):
+    """Test the per-webhook circuit breaker"""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        patcher = patch.object(webhook_model.time, "monotonic", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.webhook = Webhook(
+            id="wh_1",
+            name="dead",
+            url="https://dead.example/hook",
+            events=[WebhookEvent.SCAN_COMPLETED],
+            user_id="user_001",
+        )
+
+    def fail(self, times: int):
+        for _ in range(times):
+            self.webhook.record_delivery(False)
+
+    def test_opens_after_threshold_failures(self):
+        """Test that the circuit opens on the fifth consecutive failure"""
+        self.fail(CIRCUIT_FAILURE_THRESHOLD - 1)
+        self.assertTrue(self.webhook.allow_delivery())
+
+        self.fail(1)
+        self.assertFalse(self.webhook.allow_delivery())
+
+    def test_half_open_lets_single_probe_through(self):
+        """Test that one probe is allowed after the cool-off, then the circuit holds"""
+        self.fail(CIRCUIT_FAILURE_THRESHOLD)
+        self.clock.now += CIRCUIT_COOL_OFF
+
+        self.assertTrue(self.webhook.allow_delivery())
+        self.assertFalse(self.webhook.allow_delivery())
+
+    def test_successful_probe_closes_circuit(self):
+        """Test that a successful probe closes the circuit"""
+        self.fail(CIRCUIT_FAILURE_THRESHOLD)
+        self.clock.now += CIRCUIT_COOL_OFF
+        self.assertTrue(self.webhook.allow_delivery())
+
+        self.webhook.record_delivery(True)
+        self.assertEqual(self.webhook.consecutive_failures, 0)
+        self.assertTrue(self.webhook.allow_delivery())
+        self.assertTrue(self.webhook.allow_delivery())
+
+    def test_failed_probe_reopens_circuit(self):
+        """Test that a failed probe keeps the circuit open for another cool-off"""
+        self.fail(CIRCUIT_FAILURE_THRESHOLD)
+        self.clock.now += CIRCUIT_COOL_OFF
+        self.assertTrue(self.webhook.allow_delivery())
+
+        self.fail(1)
+        self.clock.now += CIRCUIT_COOL_OFF - 1
+        self.assertFalse(self.webhook.allow_delivery())
+
+    def test_open_circuit_defers_delivery(self):
+        """Test that deliveries skipped by an open circuit are re-queued, not lost"""
+        sent = []
+
+        def handler(request):
+            sent.append(request)
+            return httpx.Response(200)
+
+        async def run():
+            service = WebhookService()
+            service._http_client = httpx.AsyncClient(
+                transport=httpx.MockTransport(handler)
+            )
+            await service.register_webhook(self.webhook)
+            self.fail(CIRCUIT_FAILURE_THRESHOLD)
+
+            delivery = WebhookDelivery(
+                id="d1",
+                webhook_id=self.webhook.id,
+                event=WebhookEvent.SCAN_COMPLETED,
+                payload={},
+            )
+            await service.deliver_webhook(delivery)
+            self.assertEqual(sent, [])
+            self.assertEqual(service.retry_queue, [])
+            self.assertEqual(list(service._deferred[self.webhook.id]), [delivery])
+            self.assertEqual(delivery.error_message, "circuit_open")
+
+            # Still open: nothing is released
+            await service._release_deferred()
+            self.assertEqual(sent, [])
+
+            # Once the cool-off passes the deferred delivery goes out as the probe
+            self.clock.now += CIRCUIT_COOL_OFF
+            await service._release_deferred()
+            self.assertEqual(len(sent), 1)
+            self.assertEqual(self.webhook.consecutive_failures, 0)
+            self.assertEqual(service._deferred, {})
+            await service.aclose()
+
+        asyncio.run(run())
+
+    def test_expired_deferred_delivery_is_counted(self):
+        """Test that a delivery held back too long is dropped and counted"""
+        service = WebhookService()
+        asyncio.run(service.register_webhook(self.webhook))
+        self.fail(CIRCUIT_FAILURE_THRESHOLD)
+        delivery = WebhookDelivery(
+            id="d1",
+            webhook_id=self.webhook.id,
+            event=WebhookEvent.SCAN_COMPLETED,
+            payload={},
+            created_mono=self.clock.now - webhook_model.CIRCUIT_DEFER_MAX_AGE,
+        )
+
+        asyncio.run(service.deliver_webhook(delivery))
+        self.assertEqual(service._deferred, {})
+        self.assertEqual(self.webhook.dropped_count, 1)
+
+    def test_deferred_deliveries_capped_per_webhook(self):
+        """Test that deferrals beyond the per-webhook cap are dropped and counted"""
+        service = WebhookService()
+        asyncio.run(service.register_webhook(self.webhook))
+        self.fail(CIRCUIT_FAILURE_THRESHOLD)
+
+        for i in range(CIRCUIT_DEFER_MAX_ITEMS + 5):
+            delivery = WebhookDelivery(
+                id=f"d{i}",
+                webhook_id=self.webhook.id,
+                event=WebhookEvent.SCAN_COMPLETED,
+                payload={},
+            )
+            asyncio.run(service.deliver_webhook(delivery))
+
+        self.assertEqual(
+            len(service._deferred[self.webhook.id]), CIRCUIT_DEFER_MAX_ITEMS
+        )
+        self.assertEqual(self.webhook.dropped_count, 5)
+
+    def test_open_circuit_does_not_starve_other_retries(self):
+        """Test that a healthy webhook's retry is sent while a dead one is deferred"""
+        sent = []
+
+        def handler(request):
+            sent.append(str(request.url))
+            return httpx.Response(200)
+
+        async def no_sleep(_):
+            # Record progress per pass; stop after a few, the dead circuit stays open
+            ticks.append(len(sent))
+            if len(ticks) >= 3:
+                raise asyncio.CancelledError
+
+        ticks = []
+        healthy = Webhook(
+            id="wh_2",
+            name="healthy",
+            url="https://ok.example/hook",
+            events=[WebhookEvent.SCAN_COMPLETED],
+            user_id="user_001",
+        )
+
+        async def run():
+            service = WebhookService()
+            service._http_client = httpx.AsyncClient(
+                transport=httpx.MockTransport(handler)
+            )
+            await service.register_webhook(self.webhook)
+            await service.register_webhook(healthy)
+            self.fail(CIRCUIT_FAILURE_THRESHOLD)
+
+            for i in range(CIRCUIT_DEFER_MAX_ITEMS):
+                await service.deliver_webhook(
+                    WebhookDelivery(
+                        id=f"dead_{i}",
+                        webhook_id=self.webhook.id,
+                        event=WebhookEvent.SCAN_COMPLETED,
+                        payload={},
+                    )
+                )
+            service.retry_queue.append(
+                WebhookDelivery(
+                    id="retry",
+                    webhook_id=healthy.id,
+                    event=WebhookEvent.SCAN_COMPLETED,
+                    payload={},
+                    created_mono=self.clock.now - healthy.retry_backoff,
+                )
+            )
+
+            with patch("api.services.webhook_service.asyncio.sleep", no_sleep):
+                with self.assertRaises(asyncio.CancelledError):
+                    await service.process_delivery_queue()
+            await service.aclose()
+
+        asyncio.run(run())
+        # Sent on the very first pass, ahead of the 100 deferred deliveries
+        self.assertEqual(ticks[0], 1)
+        self.assertEqual(sent, ["https://ok.example/hook"])
+
+
+class TestWebhookDelivery(unittest.TestCase):
+    """Test webhook delivery requests"""
+
+    def test_signature_covers_sent_body(self):
+        """Test that the signature headers verify against the exact bytes sent"""
+        sent = []
+
+        def handler(request):
+            sent.append(request)
+            return httpx.Response(200)
+
+        async def run():
+            service = WebhookService()
+            service._http_client = httpx.AsyncClient(
+                transport=httpx.MockTransport(handler)
+            )
+            await service.register_webhook(
+                Webhook(
+                    id="wh_1",
+                    name="signed",
+                    url="https://hooks.example/signed",
+                    events=[WebhookEvent.SCAN_COMPLETED],
+                    user_id="user_001",
+                    secret="s3cret",
+                )
+            )
+            await service.deliver_webhook(
+                WebhookDelivery(
+                    id="d1",
+                    webhook_id="wh_1",
+                    event=WebhookEvent.SCAN_COMPLETED,
+                    payload={"scan": {"id": "scan_1", "target": "héllo"}, 1: "x"},
+                )
+            )
+            await service.aclose()
+
+        asyncio.run(run())
+        self.assertEqual(len(sent), 1)
+        request = sent[0]
+        expected = hmac.new(b"s3cret", request.content, hashlib.sha256).hexdigest()
+        self.assertEqual(request.headers["X-VigileGuard-Signature"], expected)
+        self.assertEqual(
+            request.headers["X-VigileGuard-Signature-256"], "sha256=" + expected
+        )
+        self.assertEqual(json.loads(request.content)["data"]["scan"]["id"], "scan_1")
+
+    def test_background_drain_sends_concurrently(self):
+        """Test that queued deliveries overlap, bounded by max_concurrency"""
+        in_flight = []
+        peak = []
+
+        async def handler(request):
+            in_flight.append(request)
+            peak.append(len(in_flight))
+            await asyncio.sleep(0.01)
+            in_flight.remove(request)
+            return httpx.Response(200)
+
+        async def run():
+            service = WebhookService(max_concurrency=3)
+            service._http_client = httpx.AsyncClient(
+                transport=httpx.MockTransport(handler)
+            )
+            for i in range(5):
+                await service.register_webhook(
+                    Webhook(
+                        id=f"wh_{i}",
+                        name=f"hook {i}",
+                        url=f"https://hooks.example/{i}",
+                        events=[WebhookEvent.SCAN_COMPLETED],
+                        user_id="user_001",
+                    )
+                )
+            await service.trigger_webhook_event(WebhookEvent.SCAN_COMPLETED, {})
+            await service.process_delivery_queue()
+            await service.aclose()
+            return service
+
+        service = asyncio.run(run())
+        self.assertEqual(len(peak), 5)
+        self.assertEqual(max(peak), 3)
+        self.assertEqual(
+            [webhook.success_count for webhook in service.webhooks.values()], [1] * 5
+        )
+
+
+class WebhookRouteCase(unittest.TestCase):
+    """Base for webhook endpoint tests, authenticating as an overridable user"""
+
+    def setUp(self):
+        api_main.request_counts.clear()
+        self.addCleanup(api_main.request_counts.clear)
+        self.addCleanup(api_main.app.dependency_overrides.clear)
+        service = webhook_routes.webhook_service
+        self.addCleanup(service.webhooks.clear)
+        self.addCleanup(service._user_webhooks.clear)
+        self.client = TestClient(api_main.app, base_url="http://localhost")
+        self.admin = auth_routes.users_db["admin"]
+        self.as_user(self.admin)
+
+    def as_user(self, user: User):
+        api_main.app.dependency_overrides[auth_routes.get_current_user] = lambda: user
+
+    def create(self, url: str = "https://hooks.example/vg"):
+        return self.client.post(
+            "/api/v1/webhooks/",
+            json={"name": "hook", "url": url, "events": ["scan.completed"]},
+        )
+
+
+class TestWebhookRoutes(WebhookRouteCase):
+    """Test the webhook management endpoints"""
+
+    def test_invalid_urls_rejected(self):
+        """Test that malformed or non-http(s) webhook URLs are rejected"""
+        for url in (
+            "http://:@",
+            "http://exa[mple/",
+            "ftp://hooks.example/vg",
+            "hooks.example/vg",
+            "https://" + "a" * 2100 + ".example",
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(self.create(url).status_code, 422)
+
+    def test_valid_urls_accepted(self):
+        """Test that http(s) URLs are accepted and stored in normalized form"""
+        for url, stored in (
+            ("https://hooks.example/vg", "https://hooks.example/vg"),
+            ("http://hooks.example", "http://hooks.example/"),
+            ("https://hooks.example:8443/a?b=1\n", "https://hooks.example:8443/a?b=1"),
+        ):
+            with self.subTest(url=url):
+                response = self.create(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.json()["url"], stored)
+
+
+class TestWebhookOwnership(WebhookRouteCase):
+    """Test the shared ownership check on per-webhook routes"""
+
+    ROUTES = (
+        ("GET", "/api/v1/webhooks/{}"),
+        ("PUT", "/api/v1/webhooks/{}"),
+        ("DELETE", "/api/v1/webhooks/{}"),
+        ("POST", "/api/v1/webhooks/{}/test"),
+        ("GET", "/api/v1/webhooks/{}/stats"),
+    )
+
+    def setUp(self):
+        super().setUp()
+        # Let developers delete too, so the ownership check decides every route
+        rbac = RBACManager()
+        rbac.add_role_permission(UserRole.DEVELOPER, Permission.WEBHOOK_DELETE)
+        api_main.app.dependency_overrides[get_rbac] = lambda: rbac
+
+        self.owner = self.developer("user_002")
+        self.other = self.developer("user_003")
+        service = webhook_routes.webhook_service
+        client = httpx.AsyncClient(
+            transport=httpx.MockTransport(lambda request: httpx.Response(200))
+        )
+        patcher = patch.object(service, "_http_client", client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def developer(self, user_id: str) -> User:
+        return User(
+            id=user_id,
+            username=user_id,
+            email=f"{user_id}@vigileguard.local",
+            role=UserRole.DEVELOPER,
+            created_at=datetime.utcnow(),
+        )
+
+    def register(self, webhook_id: str = "wh_owned") -> str:
+        webhook = Webhook(
+            id=webhook_id,
+            name="owned",
+            url="https://hooks.example/owned",
+            events=[WebhookEvent.SCAN_COMPLETED],
+            user_id=self.owner.id,
+        )
+        asyncio.run(webhook_routes.webhook_service.register_webhook(webhook))
+        return webhook_id
+
+    def call(self, method: str, path: str):
+        json_body = {"name": "renamed"} if method == "PUT" else None
+        return self.client.request(method, path, json=json_body)
+
+    def test_non_owner_denied(self):
+        """Test that another user's webhook is refused on every route"""
+        webhook_id = self.register()
+        self.as_user(self.other)
+        for method, path in self.ROUTES:
+            with self.subTest(method=method, path=path):
+                response = self.call(method, path.format(webhook_id))
+                self.assertEqual(response.status_code, 403)
+        self.assertIn(webhook_id, webhook_routes.webhook_service.webhooks)
+
+    def test_owner_and_admin_allowed(self):
+        """Test that the owner and an admin get through on every route"""
+        for user in (self.owner, self.admin):
+            self.as_user(user)
+            for method, path in self.ROUTES:
+                webhook_id = self.register()
+                with self.subTest(user=user.id, method=method, path=path):
+                    response = self.call(method, path.format(webhook_id))
+                    self.assertEqual(response.status_code, 200)
+
+    def test_unknown_webhook_not_found(self):
+        """Test that an unknown webhook id is a 404 on every route"""
+        for user in (self.owner, self.admin):
+            self.as_user(user)
+            for method, path in self.ROUTES:
+                with self.subTest(user=user.id, method=method, path=path):
+                    response = self.call(method, path.format("wh_missing"))
+                    self.assertEqual(response.status_code, 404)
+
+
+class TestRBACOverride(unittest.TestCase):
+    """Test that route-level RBAC checks use the injected get_rbac manager"""
+
+    def setUp(self):
+        api_main.request_counts.clear()
+        self.addCleanup(api_main.request_counts.clear)
+        self.addCleanup(api_main.app.dependency_overrides.clear)
+        viewer = User(
+            id="user_viewer",
+            username="viewer",
+            email="viewer@vigileguard.local",
+            role=UserRole.VIEWER,
+            created_at=datetime.utcnow(),
+        )
+        api_main.app.dependency_overrides[auth_routes.get_current_user] = lambda: viewer
+        self.client = TestClient(api_main.app, base_url="http://localhost")
+
+    def override(self, *permissions: Permission):
+        rbac = RBACManager()
+        for permission in permissions:
+            rbac.add_role_permission(UserRole.VIEWER, permission)
+        api_main.app.dependency_overrides[get_rbac] = lambda: rbac
+
+    def test_inline_permission_check_uses_override(self):
+        """Test that an in-route has_permission check sees the overridden manager"""
+        self.assertEqual(self.client.get("/api/v1/auth/api-keys").status_code, 403)
+
+        self.override(Permission.APIKEY_READ)
+        self.assertEqual(self.client.get("/api/v1/auth/api-keys").status_code, 200)
+
+    def test_reported_permissions_use_override(self):
+        """Test that /auth/me reports permissions from the overridden manager"""
+        self.override(Permission.SCAN_DELETE)
+        permissions = self.client.get("/api/v1/auth/me").json()["permissions"]
+        self.assertIn(Permission.SCAN_DELETE.value, permissions)
+
+
+class TestConfigETag(unittest.TestCase):
+    """Test conditional GETs of the system configuration"""
+
+    def setUp(self):
+        api_main.request_counts.clear()
+        self.addCleanup(api_main.request_counts.clear)
+        admin = auth_routes.users_db["admin"]
+        api_main.app.dependency_overrides[auth_routes.get_current_user] = lambda: admin
+        self.addCleanup(api_main.app.dependency_overrides.clear)
+        patcher = patch.dict(
+            config_routes.system_config, copy.deepcopy(config_routes.system_config)
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(config_routes._bump_config_version)
+        self.client = TestClient(api_main.app, base_url="http://localhost")
+
+    def get(self, etag=None):
+        headers = {"If-None-Match": etag} if etag else {}
+        return self.client.get("/api/v1/config/", headers=headers)
+
+    def test_matching_etag_not_modified(self):
+        """Test that an unchanged config answers If-None-Match with 304"""
+        etag = self.get().headers["ETag"]
+        response = self.get(etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.headers["ETag"], etag)
+
+    def test_update_changes_etag(self):
+        """Test that a config update invalidates the previously issued ETag"""
+        etag = self.get().headers["ETag"]
+        response = self.client.put(
+            "/api/v1/config/", json={"severity_thresholds": {"high": 5}}
+        )
+        self.assertEqual(response.status_code, 200)
+
+        response = self.get(etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers["ETag"], etag)
+        self.assertEqual(response.json()["severity_thresholds"]["high"], 5)
+
+    def test_etag_independent_of_version_counter(self):
+        """Test that another worker on the same version counter issues its own ETag"""
+        etag = self.get().headers["ETag"]
+
+        # A second process whose counter matches ours but whose config differs
+        config_routes.system_config["severity_thresholds"]["high"] = 5
+        with patch.multiple(
+            config_routes,
+            _config_yaml_cache=(-1, ""),
+            _config_etag_cache=(-1, ""),
+            _config_response_cache=(-1, None),
+        ):
+            response = self.get(etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers["ETag"], etag)
+
+
+class TestRBACRouteResolution(unittest.TestCase):
+    """Test route template resolution and cached access decisions"""
+
+    def setUp(self):
+        self.rbac = RBACManager()
+
+    def test_parametrised_path_resolves_to_template(self):
+        """Test that a concrete id segment matches its {param} template"""
+        self.assertEqual(
+            self.rbac._match_route("GET", "/api/v1/scans/scan_42"),
+            ("GET", "/api/v1/scans/{scan_id}"),
+        )
+        self.assertEqual(
+            self.rbac._match_route("POST", "/api/v1/scans/scan_42/run"),
+            ("POST", "/api/v1/scans/{scan_id}/run"),
+        )
+
+    def test_literal_segment_preferred_over_parameter(self):
+        """Test that a literal route wins over a sibling {param} route"""
+        self.assertEqual(
+            self.rbac._match_route("POST", "/api/v1/reports/export"),
+            ("POST", "/api/v1/reports/export"),
+        )
+
+    def test_unknown_route(self):
+        """Test that unknown paths and methods resolve to no template"""
+        self.assertIsNone(self.rbac._match_route("GET", "/api/v1/unknown/thing"))
+        self.assertIsNone(self.rbac._match_route("GET", "/api/v1/scans/a/b/c"))
+        self.assertIsNone(self.rbac._match_route("PATCH", "/api/v1/scans/scan_42"))
+        # Routes without declared requirements stay open, as before
+        self.assertTrue(
+            self.rbac.can_access_resource(UserRole.VIEWER, "GET", "/api/v1/unknown")
+        )
+
+    def test_role_permission_change_invalidates_cached_decision(self):
+        """Test that granting then revoking a permission is reflected immediately"""
+        path = "/api/v1/scans/scan_42"
+        self.assertFalse(self.rbac.can_access_resource(UserRole.VIEWER, "DELETE", path))
+
+        self.rbac.add_role_permission(UserRole.VIEWER, Permission.SCAN_DELETE)
+        self.assertTrue(self.rbac.can_access_resource(UserRole.VIEWER, "DELETE", path))
+
+        self.rbac.remove_role_permission(UserRole.VIEWER, Permission.SCAN_DELETE)
+        self.assertFalse(self.rbac.can_access_resource(UserRole.VIEWER, "DELETE", path))
+
+    def test_role_permission_change_clears_decision_cache(self):
+        """Test that mutating role permissions drops every cached decision"""
+        self.rbac.warm_up()
+        self.assertGreater(self.rbac._access_cache.cache_info().currsize, 0)
+
+        self.rbac.add_role_permission(UserRole.VIEWER, Permission.SCAN_DELETE)
+        self.assertEqual(self.rbac._access_cache.cache_info().currsize, 0)
+
+
+class TestRateLimitMiddleware(unittest.TestCase):
+    """Test the per-IP rate limiter"""
+
+    def setUp(self):
+        api_main.request_counts.clear()
+        self.addCleanup(api_main.request_counts.clear)
+        self.client = TestClient(api_main.app, base_url="http://localhost")
+
+    def test_limit_enforced(self):
+        """Test that requests beyond the limit get 429 within the window"""
+        with patch.object(api_main, "RATE_LIMIT_REQUESTS", 3):
+            codes = [self.client.get("/health").status_code for _ in range(4)]
+        self.assertEqual(codes, [200, 200, 200, 429])
+
+    def test_expired_requests_leave_window(self):
+        """Test that requests older than the window no longer count"""
+        with patch.object(api_main, "RATE_LIMIT_REQUESTS", 2):
+            self.client.get("/health")
+            self.client.get("/health")
+            self.assertEqual(self.client.get("/health").status_code, 429)
+
+            timestamps = api_main.request_counts["testclient"]
+            for i in range(len(timestamps)):
+                timestamps[i] -= api_main.RATE_LIMIT_WINDOW
+            self.assertEqual(self.client.get("/health").status_code, 200)
+
+    def test_oldest_ip_evicted_at_cap(self):
+        """Test that the least recently seen IP is dropped past MAX_TRACKED_IPS"""
+        now = time.time()
+        for client_ip in ("10.0.0.1", "10.0.0.2"):
+            api_main.request_counts[client_ip] = deque([now])
+
+        with patch.object(api_main, "MAX_TRACKED_IPS", 2):
+            self.client.get("/health")
+
+        self.assertEqual(list(api_main.request_counts), ["10.0.0.2", "testclient"])
+
+    def test_sweep_removes_expired_entries(self):
+        """Test that the sweep drops IPs whose newest request left the window"""
+        now = time.time()
+        stale = now - api_main.RATE_LIMIT_WINDOW - 1
+        api_main.request_counts["10.0.0.1"] = deque([stale])
+        api_main.request_counts["10.0.0.2"] = deque([stale, now])
+        api_main.request_counts["10.0.0.3"] = deque()
+
+        self.assertEqual(api_main.sweep_request_counts(), 2)
+        self.assertEqual(list(api_main.request_counts), ["10.0.0.2"])
+
+
+class TestJWTClaimsCache(unittest.TestCase):
+    """Test the short-lived verified-claims cache"""
+
+    def setUp(self):
+        auth_routes._jwt_cache.clear()
+        self.addCleanup(auth_routes._jwt_cache.clear)
+        self.handler = auth_routes.jwt_handler
+
+    def token(self, expires_delta=None, user_id="user_001"):
+        return self.handler.create_token(
+            {"sub": user_id, "username": "admin", "role": "admin", "type": "access"},
+            expires_delta=expires_delta,
+        )
+
+    def verify(self, token):
+        return asyncio.run(auth_routes._verify_cached(token))
+
+    def test_valid_token_cached(self):
+        """Test that a verified token is served from the cache"""
+        token = self.token()
+        self.assertEqual(self.verify(token)["user_id"], "user_001")
+        self.assertEqual(len(auth_routes._jwt_cache), 1)
+
+        with patch.object(JWTHandler, "extract_user_info") as extract:
+            self.assertEqual(self.verify(token)["user_id"], "user_001")
+        extract.assert_not_called()
+
+    def test_entry_dropped_after_ttl(self):
+        """Test that cached claims are re-verified once the TTL has passed"""
+        token = self.token()
+        self.verify(token)
+        later = time.time() + auth_routes.JWT_CACHE_TTL + 1
+
+        with patch.object(auth_routes.time, "time", return_value=later):
+            with patch.object(JWTHandler, "extract_user_info", return_value=None):
+                self.assertIsNone(self.verify(token))
+        self.assertEqual(len(auth_routes._jwt_cache), 0)
+
+    def test_cache_entry_never_outlives_token(self):
+        """Test that a token expiring before the TTL is dropped at its own expiry"""
+        token = self.token(expires_delta=timedelta(seconds=2))
+        self.verify(token)
+        expires_at = next(iter(auth_routes._jwt_cache.values()))[0]
+        self.assertLessEqual(expires_at, time.time() + 2)
+
+        with patch.object(auth_routes.time, "time", return_value=time.time() + 3):
+            self.assertIsNone(
+                auth_routes._cached_claims(next(iter(auth_routes._jwt_cache)))
+            )
+        self.assertEqual(len(auth_routes._jwt_cache), 0)
+
+    def test_expired_or_tampered_token_not_cached(self):
+        """Test that tokens failing verification are rejected and never cached"""
+        expired = self.token(expires_delta=timedelta(seconds=-10))
+        header, payload, signature = self.token().split(".")
+        tampered = ".".join((header, payload, signature[::-1]))
+
+        self.assertIsNone(self.verify(expired))
+        self.assertIsNone(self.verify(tampered))
+        self.assertEqual(len(auth_routes._jwt_cache), 0)
+
+    def test_cached_claims_for_unknown_user_rejected(self):
+        """Test that cached claims still go through the user lookup"""
+        token = self.token(user_id="user_removed")
+        self.verify(token)
+        credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+        with self.assertRaises(HTTPException) as ctx:
+            asyncio.run(auth_routes.get_current_user(credentials))
+        self.assertEqual(ctx.exception.status_code, 401)
+
+    def test_cache_is_bounded(self):
+        """Test that the least recently used entries are evicted at the size cap"""
+        tokens = [self.token() for _ in range(5)]
+        with patch.object(auth_routes, "JWT_CACHE_MAXSIZE", 3):
+            for token in tokens:
+                self.verify(token)
+        self.assertEqual(len(auth_routes._jwt_cache), 3)
+
+        with patch.object(JWTHandler, "extract_user_info", return_value=None):
+            self.assertIsNone(self.verify(tokens[0]))
+            self.assertIsNotNone(self.verify(tokens[-1]))
+
+
+if __name__ == "__main__":
+    unittest.main()